@@ -2,7 +2,94 @@ import os
 
 APP_TITLE = "Whisper Transcription 0.7"
 MODEL_ID = "openai/whisper-large-v2"
+# Modelo borrador de la decodificación asistida de Whisper Original (debe compartir el vocabulario)
+ASSISTANT_MODEL_ID = "openai/whisper-tiny"
 SUPPORTED_AUDIO_FORMATS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg')
 
 # Define MODEL_DIR in a specific location of your choice
-MODEL_DIR = os.path.join(os.path.expanduser("~"), "whisper_models")
\ No newline at end of file
+MODEL_DIR = os.path.join(os.path.expanduser("~"), "whisper_models")
+
+# Catálogo persistente de metadatos de audio (duración, formato, hash)
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_catalog.db")
+
+# Espera (ms) para agrupar cambios en la carpeta de audio antes de actualizar la lista
+INPUT_WATCH_DEBOUNCE_MS = 1500
+
+# Cada cuánto (ms) la interfaz lee el bus de progreso; los eventos intermedios se descartan
+PROGRESS_UPDATE_MS = 200
+
+# Sumas acumuladas del modelo de tiempo de transcripción (preparación + ritmo por segundo de audio)
+THROUGHPUT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "throughput_model.json")
+
+# Historial de transcripciones (SQLite, una fila por archivo) y el JSON que reemplaza.
+# Cada STATS_COMPACT_EVERY filas se borran las transcripciones repetidas de un mismo archivo.
+STATS_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcription_stats.db")
+LEGACY_STATS_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcription_data.json")
+STATS_COMPACT_EVERY = 1000
+
+# Modelo de Faster-Whisper y memoria máxima (GB) para mantener modelos cargados en caché
+FASTER_WHISPER_MODEL = "large-v2"
+MODEL_CACHE_BUDGET_GB = 12
+
+# Precargar en segundo plano el modelo seleccionado cuando la ventana queda libre
+MODEL_WARMUP_ENABLED = True
+
+# Procesos de transcripción en paralelo para los motores en proceso (1 = secuencial).
+# Los hilos de CPU se reparten entre los procesos.
+TRANSCRIPTION_WORKERS = 1
+
+# Compartir una sola copia de los pesos entre los trabajadores en paralelo
+SHARE_MODEL_WEIGHTS = True
+
+# Con varios procesos, cortar los archivos largos en silencios y transcribir las partes en paralelo
+SHARD_LONG_FILES = True
+SHARD_MIN_SECONDS = 300
+
+# Whisper Original: tamaño de lote y agrupar en un mismo lote ventanas de varios archivos
+PIPELINE_BATCH_SIZE = 16
+BATCH_ACROSS_FILES = True
+
+# Ventanas por lote en la decodificación por lotes de Faster-Whisper
+FASTER_WHISPER_BATCH_SIZE = 8
+
+# Faster-Whisper decodifica cada ventana en modo voraz y repite con búsqueda en haz solo las que
+# no pasan los umbrales de la calidad elegida (no se usa con la decodificación por lotes)
+ADAPTIVE_BEAM = True
+
+# Caché de audio decodificado (16 kHz mono float32) compartido por los motores en proceso
+PCM_CACHE_ENABLED = True
+PCM_CACHE_DIR = os.path.join(os.path.expanduser("~"), "whisper_pcm_cache")
+PCM_CACHE_MAX_GB = 20
+
+# Archivos que se decodifican y analizan por adelantado mientras se transcribe el actual
+PREFETCH_DEPTH = 2
+
+# Archivos de al menos STREAMING_MIN_SECONDS se transcriben por ventanas para que la
+# memoria no crezca con la duración
+STREAMING_ENABLED = True
+STREAMING_MIN_SECONDS = 3600
+STREAMING_WINDOW_SECONDS = 300
+
+# Guardar puntos de control por segmento para retomar transcripciones interrumpidas
+RESUME_TRANSCRIPTIONS = True
+
+# Caché de transcripciones por contenido del audio y opciones: las copias idénticas no se retranscriben
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), "whisper_result_cache")
+
+# Huellas espectrales para detectar grabaciones casi idénticas (re-codificadas o recortadas).
+# Requieren decodificar cada archivo: con FINGERPRINT_ON_SCAN se calculan al cargar la carpeta.
+# NEAR_DUPLICATE_ACTION: "reuse" copia la transcripción existente, "flag" solo avisa.
+FINGERPRINT_ENABLED = False
+FINGERPRINT_ON_SCAN = True
+NEAR_DUPLICATE_THRESHOLD = 0.72
+NEAR_DUPLICATE_DURATION_TOLERANCE = 0.1
+NEAR_DUPLICATE_ACTION = "reuse"
+
+# Con "Auto", un modelo pequeño identifica el idioma de cada archivo con una muestra de voz y el
+# lote se transcribe agrupado por idioma con el idioma forzado. Si la probabilidad queda por
+# debajo de LANGUAGE_ID_MIN_PROBABILITY el archivo se deja en detección automática.
+LANGUAGE_ID_ENABLED = True
+LANGUAGE_ID_MODEL = "tiny"
+LANGUAGE_ID_SAMPLE_SECONDS = 90
+LANGUAGE_ID_MIN_PROBABILITY = 0.8
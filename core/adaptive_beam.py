@@ -0,0 +1,114 @@
+import time
+from core.pcm_cache import SAMPLE_RATE
+from core.sharding import Segment
+
+# Decodificación adaptativa para Faster-Whisper: cada ventana de voz de hasta 30 s se decodifica
+# primero en modo voraz y solo se repite con búsqueda en haz si no pasa los umbrales de la calidad
+# elegida (compresión, logprob medio), como la recaída por temperatura de Whisper.
+# Faster-Whisper usa muestreo con cualquier temperatura mayor que 0, así que las dos pasadas
+# se hacen a temperatura 0: es la única forma de que beam_size tenga efecto.
+
+WINDOW_SECONDS = 30
+BEAM_SIZE = 5
+PATIENCE = 1.2
+
+def plan_windows(speech_chunks, max_samples=WINDOW_SECONDS * SAMPLE_RATE):
+    # Agrupa regiones de voz consecutivas en ventanas de como mucho max_samples de voz
+    windows = []
+    current = []
+    current_samples = 0
+    for chunk in speech_chunks:
+        start = chunk['start']
+        while start < chunk['end']:
+            end = min(chunk['end'], start + max_samples)
+            if current and current_samples + end - start > max_samples:
+                windows.append(current)
+                current, current_samples = [], 0
+            current.append({'start': start, 'end': end})
+            current_samples += end - start
+            start = end
+    if current:
+        windows.append(current)
+    return windows
+
+def window_fails(segments, job):
+    # Mismo criterio que la recaída de Whisper; el silencio (no_speech alto con logprob bajo) no cuenta
+    compression_ratio_threshold = job.get('compression_ratio_threshold')
+    logprob_threshold = job.get('logprob_threshold')
+    no_speech_threshold = job.get('no_speech_threshold')
+    for segment in segments:
+        if compression_ratio_threshold is not None and segment.compression_ratio > compression_ratio_threshold:
+            return True
+        if logprob_threshold is not None and segment.avg_logprob < logprob_threshold:
+            if no_speech_threshold is None or segment.no_speech_prob <= no_speech_threshold:
+                return True
+    return False
+
+def decode_window(model, audio, job, prompt, beam_size):
+    segments, info = model.transcribe(
+        audio,
+        task=job['task'],
+        language=job['language'],
+        temperature=0.0,
+        beam_size=beam_size,
+        patience=PATIENCE if beam_size > 1 else 1,
+        initial_prompt=prompt,
+        compression_ratio_threshold=job.get('compression_ratio_threshold'),
+        log_prob_threshold=job.get('logprob_threshold'),
+        no_speech_threshold=job.get('no_speech_threshold'),
+        vad_filter=False
+    )
+    return list(segments), info
+
+def new_stats():
+    # 'language': idioma detectado en la primera ventana cuando el trabajo está en "Auto"
+    return {'windows': 0, 'escalated': 0, 'greedy_time': 0.0, 'beam_time': 0.0, 'language': None}
+
+def merge_stats(total, stats):
+    # Suma los contadores de una parte de un archivo cortado
+    for key in ('windows', 'escalated', 'greedy_time', 'beam_time'):
+        total[key] += stats[key]
+    return total
+
+def transcribe_adaptive(model, audio, job, speech_chunks=None, prompt=None, stats=None):
+    # Genera Segment con tiempos del audio recibido, ventana por ventana.
+    # stats: diccionario de new_stats() que se actualiza con las ventanas escaladas. También guarda
+    # el idioma de la primera ventana: si cada llamada a transcribe() lo detectara por su cuenta,
+    # el archivo podría cambiar de idioma a mitad. Con el mismo stats entre ventanas de streaming
+    # el idioma se mantiene en todo el archivo.
+    from core.speech_segments import get_speech_chunks, collect_speech, SpeechTimeMap
+
+    if stats is None:
+        stats = new_stats()
+    if job['language'] is None and stats['language'] is not None:
+        job = dict(job, language=stats['language'])
+    if speech_chunks is None:
+        speech_chunks = get_speech_chunks(audio)
+    condition = job.get('condition_on_previous_text', True)
+
+    for window_chunks in plan_windows(speech_chunks):
+        window_audio = collect_speech(audio, window_chunks)
+        time_map = SpeechTimeMap(window_chunks)
+
+        start_time = time.perf_counter()
+        segments, info = decode_window(model, window_audio, job, prompt, 1)
+        stats['greedy_time'] += time.perf_counter() - start_time
+        stats['windows'] += 1
+        if job['language'] is None:
+            stats['language'] = info.language
+            job = dict(job, language=info.language)
+        if window_fails(segments, job):
+            start_time = time.perf_counter()
+            segments, info = decode_window(model, window_audio, job, prompt, BEAM_SIZE)
+            stats['beam_time'] += time.perf_counter() - start_time
+            stats['escalated'] += 1
+
+        for segment in segments:
+            yield Segment(time_map.get_original_time(segment.start), time_map.get_original_time(segment.end, is_end=True), segment.text)
+        if condition and segments:
+            prompt = segments[-1].text
+
+def format_stats(stats):
+    rate = stats['escalated'] / stats['windows'] if stats['windows'] else 0.0
+    return (f"{stats['escalated']} de {stats['windows']} ventanas con búsqueda en haz ({rate:.0%}); "
+            f"voraz {stats['greedy_time']:.1f}s, haz {stats['beam_time']:.1f}s")
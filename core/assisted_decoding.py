@@ -0,0 +1,100 @@
+import time
+
+# Decodificación asistida del pipeline de transformers: un Whisper pequeño propone varios tokens
+# y large-v2 los verifica en una sola pasada. Con do_sample=False y num_beams=1 el texto es el
+# mismo que el de la decodificación voraz; solo cambia cuántas pasadas del modelo grande hacen falta.
+
+class DecodingCounter:
+    # Cuenta las pasadas de los decodificadores y los tokens generados con ganchos en los módulos.
+    # Los totales son acumulados; el informe de un archivo es la diferencia entre dos instantáneas.
+    def __init__(self, model, assistant):
+        self.model = model
+        self.assistant = assistant
+        self.totals = {'target_passes': 0, 'draft_passes': 0, 'tokens': 0, 'target_time': 0.0, 'draft_time': 0.0}
+        # Largo del prompt forzado del decodificador (inicio, idioma, tarea) en la llamada actual
+        self.prompt_length = 0
+        self.install(model.get_decoder(), 'target')
+        self.install(assistant.get_decoder(), 'draft')
+
+        original_generate = model.generate
+
+        def generate(*args, **kwargs):
+            self.prompt_length = 0
+            output = original_generate(*args, **kwargs)
+            self.count_tokens(output)
+            return output
+
+        model.generate = generate
+
+    def install(self, module, name):
+        started = {}
+
+        def before(module, args, kwargs):
+            started['time'] = time.perf_counter()
+            if name == 'target':
+                self.observe_prompt(args, kwargs)
+
+        def after(module, args, kwargs, output):
+            self.totals[f'{name}_passes'] += 1
+            self.totals[f'{name}_time'] += time.perf_counter() - started['time']
+
+        module.register_forward_pre_hook(before, with_kwargs=True)
+        module.register_forward_hook(after, with_kwargs=True)
+
+    def observe_prompt(self, args, kwargs):
+        # Una pasada sin caché procesa el prompt entero: su largo es el del prompt forzado.
+        # La detección de idioma hace antes otra pasada sin caché con solo el token de inicio.
+        input_ids = kwargs.get('input_ids', args[0] if args else None)
+        cache = kwargs.get('past_key_values')
+        if cache is not None and not (hasattr(cache, 'get_seq_length') and cache.get_seq_length() == 0):
+            return
+        if input_ids is not None and hasattr(input_ids, 'shape'):
+            self.prompt_length = max(self.prompt_length, input_ids.shape[-1])
+
+    def count_tokens(self, output):
+        # Solo los tokens generados: el prompt forzado no lo propone el borrador ni cuesta pasadas
+        sequences = output['sequences'] if isinstance(output, dict) else output
+        if not hasattr(sequences, 'ne'):
+            return
+        pad_token_id = self.model.generation_config.pad_token_id
+        tokens = int(sequences.ne(pad_token_id).sum()) if pad_token_id is not None else sequences.numel()
+        # Según la versión de transformers, las secuencias traen el prompt delante o no
+        start_token_id = self.model.generation_config.decoder_start_token_id
+        if sequences.dim() == 2 and sequences.shape[-1] and start_token_id is not None and int(sequences[0, 0]) == start_token_id:
+            tokens -= self.prompt_length * sequences.shape[0]
+        self.totals['tokens'] += max(0, tokens)
+
+    def snapshot(self):
+        return dict(self.totals)
+
+    def report(self, before):
+        delta = {key: self.totals[key] - before[key] for key in self.totals}
+        # Cada pasada del modelo grande aporta un token propio; el resto son propuestas aceptadas
+        accepted = max(0, delta['tokens'] - delta['target_passes'])
+        decode_time = delta['target_time'] + delta['draft_time']
+        # Sin asistencia haría falta una pasada por token. Las pasadas de verificación procesan
+        # varios tokens y tardan algo más que una normal, así que la aceleración es aproximada.
+        pass_time = delta['target_time'] / delta['target_passes'] if delta['target_passes'] else 0.0
+        greedy_time = delta['tokens'] * pass_time
+        return {
+            'tokens': delta['tokens'],
+            'target_passes': delta['target_passes'],
+            'draft_passes': delta['draft_passes'],
+            'acceptance_rate': accepted / delta['draft_passes'] if delta['draft_passes'] else 0.0,
+            'tokens_per_pass': delta['tokens'] / delta['target_passes'] if delta['target_passes'] else 0.0,
+            'decode_time': decode_time,
+            'estimated_greedy_time': greedy_time,
+            'speedup': greedy_time / decode_time if decode_time > 0 else 0.0
+        }
+
+def enable_assisted_decoding(pipe):
+    # Devuelve el contador del pipeline; la primera vez carga el modelo borrador e instala los ganchos
+    counter = getattr(pipe, 'decoding_counter', None)
+    if counter is None:
+        from core.whisper_model import get_assistant_model
+        counter = pipe.decoding_counter = DecodingCounter(pipe.model, get_assistant_model())
+    return counter
+
+def format_report(report):
+    return (f"{report['acceptance_rate']:.0%} de tokens propuestos aceptados, "
+            f"{report['tokens_per_pass']:.2f} tokens por pasada, aceleración estimada {report['speedup']:.2f}x")
@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import hashlib
+import argparse
+import config
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def compute_content_hash(file_path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class AudioCatalog:
+    # Cada hilo debe abrir su propia instancia: la conexión de sqlite no se comparte entre hilos
+    def __init__(self, db_path=config.CATALOG_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                duration REAL,
+                sample_rate INTEGER,
+                channels INTEGER,
+                codec TEXT,
+                tier TEXT,
+                content_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                content_hash TEXT PRIMARY KEY,
+                duration REAL NOT NULL,
+                fingerprint BLOB NOT NULL,
+                compute_time REAL
+            );
+            CREATE INDEX IF NOT EXISTS fingerprints_duration ON fingerprints (duration);
+            CREATE TABLE IF NOT EXISTS languages (
+                content_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                language TEXT,
+                probability REAL,
+                PRIMARY KEY (content_hash, model)
+            );
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def lookup(self, path, size, mtime):
+        # Solo es válido si el archivo no cambió desde que se catalogó
+        row = self.conn.execute("SELECT * FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None or row['size'] != size or row['mtime'] != mtime:
+            return None
+        return dict(row)
+
+    def store(self, path, size, mtime, info, content_hash=None):
+        if content_hash is None:
+            # Conserva el hash ya calculado si el archivo no cambió
+            row = self.lookup(path, size, mtime)
+            content_hash = row['content_hash'] if row is not None else None
+        self.conn.execute("""
+            INSERT OR REPLACE INTO files (path, size, mtime, duration, sample_rate, channels, codec, tier, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (path, size, mtime, info['duration'], info['sample_rate'], info['channels'],
+              info['codec'], info['tier'], content_hash))
+
+    def get_content_hash(self, path):
+        # El hash se calcula recién cuando alguien lo pide y queda guardado
+        stat = os.stat(path)
+        row = self.lookup(path, stat.st_size, stat.st_mtime)
+        if row is not None and row['content_hash']:
+            return row['content_hash']
+
+        content_hash = compute_content_hash(path)
+        if row is not None:
+            self.conn.execute("UPDATE files SET content_hash = ? WHERE path = ?", (content_hash, path))
+        else:
+            # Archivo sin catalogar o que cambió: fila solo con el hash, sin datos de sondeo
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime, content_hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime, content_hash)
+            )
+        self.conn.commit()
+        return content_hash
+
+    def _prefix_range(self, directory):
+        prefix = os.path.join(os.path.normpath(directory), '')
+        return prefix, prefix + '\uffff'
+
+    def entries_under(self, directory):
+        low, high = self._prefix_range(directory)
+        rows = self.conn.execute(
+            "SELECT * FROM files WHERE path >= ? AND path < ? ORDER BY path", (low, high)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def evict_missing(self, directory=None, seen_paths=None):
+        if directory is not None:
+            low, high = self._prefix_range(directory)
+            rows = self.conn.execute("SELECT path FROM files WHERE path >= ? AND path < ?", (low, high)).fetchall()
+        else:
+            rows = self.conn.execute("SELECT path FROM files").fetchall()
+
+        if seen_paths is not None:
+            stale = [row['path'] for row in rows if row['path'] not in seen_paths]
+        else:
+            stale = [row['path'] for row in rows if not os.path.exists(row['path'])]
+
+        self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in stale])
+        self.conn.commit()
+        return len(stale)
+
+    def invalidate(self, directory=None):
+        if directory is None:
+            cursor = self.conn.execute("DELETE FROM files")
+        else:
+            low, high = self._prefix_range(directory)
+            cursor = self.conn.execute("DELETE FROM files WHERE path >= ? AND path < ?", (low, high))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def get_fingerprint(self, content_hash):
+        row = self.conn.execute("SELECT * FROM fingerprints WHERE content_hash = ?", (content_hash,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def store_fingerprint(self, content_hash, duration, fingerprint, compute_time):
+        self.conn.execute("""
+            INSERT OR REPLACE INTO fingerprints (content_hash, duration, fingerprint, compute_time)
+            VALUES (?, ?, ?, ?)
+        """, (content_hash, duration, fingerprint, compute_time))
+        self.conn.commit()
+
+    def fingerprints_between(self, min_duration, max_duration):
+        rows = self.conn.execute(
+            "SELECT * FROM fingerprints WHERE duration >= ? AND duration <= ?", (min_duration, max_duration)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_language(self, content_hash, model):
+        row = self.conn.execute(
+            "SELECT language, probability FROM languages WHERE content_hash = ? AND model = ?", (content_hash, model)
+        ).fetchone()
+        return (row['language'], row['probability']) if row is not None else None
+
+    def store_language(self, content_hash, model, language, probability):
+        self.conn.execute("""
+            INSERT OR REPLACE INTO languages (content_hash, model, language, probability)
+            VALUES (?, ?, ?, ?)
+        """, (content_hash, model, language, probability))
+        self.conn.commit()
+
+    def get_setting(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row is not None else default
+
+    def set_setting(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+        self.conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento del catálogo de metadatos de audio")
+    parser.add_argument('--invalidate', action='store_true', help="Borrar las entradas del catálogo")
+    parser.add_argument('--evict', action='store_true', help="Quitar las entradas de archivos que ya no existen")
+    parser.add_argument('--folder', default=None, help="Limitar la operación a esta carpeta")
+    args = parser.parse_args()
+
+    catalog = AudioCatalog()
+    if args.invalidate:
+        print(f"Entradas invalidadas: {catalog.invalidate(args.folder)}")
+    if args.evict:
+        print(f"Entradas eliminadas: {catalog.evict_missing(args.folder)}")
+    catalog.close()
+
+if __name__ == "__main__":
+    main()
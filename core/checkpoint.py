@@ -0,0 +1,148 @@
+import os
+import json
+import threading
+
+# Puntos de control para retomar transcripciones interrumpidas:
+# - JobManifest: registro (una línea JSON por archivo terminado) en la carpeta de resultados
+# - SegmentWriter: escribe el .txt segmento a segmento y guarda al lado hasta dónde llegó
+
+MANIFEST_NAME = ".transcription_manifest.jsonl"
+CHECKPOINT_SUFFIX = ".checkpoint"
+HEADER = "Transcripción con timestamps:\n"
+
+# Opciones que cambian la velocidad pero no el texto: no entran en la firma ni en la caché
+OUTPUT_NEUTRAL_OPTIONS = ('assisted_decoding',)
+# Opciones que solo existen en un motor; con otro no se aplican y tampoco deben cambiar la firma
+ENGINE_OPTIONS = {'batched_decoding': "faster-whisper"}
+
+def output_options(job, engine=None):
+    return {key: value for key, value in job.items()
+            if key not in OUTPUT_NEUTRAL_OPTIONS and ENGINE_OPTIONS.get(key, engine) == engine}
+
+def job_signature(engine, job):
+    # Dos ejecuciones con la misma firma producen la misma transcripción
+    return json.dumps(dict(output_options(job, engine), engine=engine), sort_keys=True, default=str)
+
+def read_json_lines(path):
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Última línea a medio escribir si el programa se cerró de golpe
+                    break
+    except FileNotFoundError:
+        pass
+    return records
+
+class JobManifest:
+    def __init__(self, base_output_dir):
+        os.makedirs(base_output_dir, exist_ok=True)
+        self.path = os.path.join(base_output_dir, MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.done = {}
+        for record in read_json_lines(self.path):
+            self.done[record['path']] = record
+
+    def get_key(self, input_path):
+        return os.path.normcase(os.path.abspath(input_path))
+
+    def is_done(self, input_path, output_path, signature):
+        record = self.done.get(self.get_key(input_path))
+        if record is None or record['signature'] != signature or not os.path.exists(output_path):
+            return False
+        try:
+            stat = os.stat(input_path)
+        except OSError:
+            return False
+        # Si el audio cambió desde entonces, se vuelve a transcribir
+        return record['size'] == stat.st_size and record['mtime'] == stat.st_mtime
+
+    def mark_done(self, input_path, output_path, signature):
+        stat = os.stat(input_path)
+        record = {'path': self.get_key(input_path), 'output': output_path, 'signature': signature,
+                  'size': stat.st_size, 'mtime': stat.st_mtime}
+        with self.lock:
+            self.done[record['path']] = record
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+
+    def pending(self, files, get_output_path, signature):
+        # files: lista de (ruta, carpeta relativa); devuelve (pendientes, cantidad ya terminados)
+        remaining = [(input_path, relative_path) for input_path, relative_path in files
+                     if not self.is_done(input_path, get_output_path(input_path, relative_path), signature)]
+        return remaining, len(files) - len(remaining)
+
+class SegmentWriter:
+    # Cada línea del .txt se confirma en el archivo .checkpoint con su tiempo final y el
+    # tamaño del .txt en ese momento. Al retomar se recorta el .txt a lo último confirmado.
+    def __init__(self, output_path, signature=None, progress=None):
+        self.output_path = output_path
+        self.checkpoint_path = output_path + CHECKPOINT_SUFFIX
+        self.signature = signature
+        # ProgressTracker opcional que recibe el tiempo final de cada segmento escrito
+        self.progress = progress
+        self.resume_time = 0.0
+
+        last = self.load_checkpoint() if signature is not None else None
+        if last is not None:
+            self.resume_time = last['end']
+            self.text_file = open(output_path, 'r+', encoding='utf-8')
+            self.text_file.truncate(last['bytes'])
+            self.text_file.seek(0, os.SEEK_END)
+            self.checkpoint_file = open(self.checkpoint_path, 'a', encoding='utf-8')
+        else:
+            self.start_fresh()
+
+    def load_checkpoint(self):
+        records = read_json_lines(self.checkpoint_path)
+        if not records or records[0].get('signature') != self.signature or not os.path.exists(self.output_path):
+            return None
+        if os.path.getsize(self.output_path) < records[-1]['bytes']:
+            return None
+        return records[-1]
+
+    def start_fresh(self):
+        self.resume_time = 0.0
+        self.text_file = open(self.output_path, 'w', encoding='utf-8')
+        self.text_file.write(HEADER)
+        self.text_file.flush()
+        self.checkpoint_file = open(self.checkpoint_path, 'w', encoding='utf-8')
+        self.commit(0.0, signature=self.signature)
+
+    def restart(self):
+        # Para cuando no se puede continuar a mitad de archivo (audio sin decodificar)
+        self.text_file.close()
+        self.checkpoint_file.close()
+        self.start_fresh()
+
+    def commit(self, end, **extra):
+        record = dict(extra, end=end, bytes=self.text_file.tell())
+        self.checkpoint_file.write(json.dumps(record) + "\n")
+        self.checkpoint_file.flush()
+
+    def write_text(self, text):
+        self.text_file.write(text)
+        self.text_file.flush()
+
+    def write(self, line, end):
+        self.write_text(line)
+        self.commit(end)
+        if self.progress is not None:
+            self.progress.segment(end)
+
+    def close(self, complete=True):
+        self.text_file.close()
+        self.checkpoint_file.close()
+        if complete and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # Si falla a mitad, el punto de control queda para la próxima vez
+        self.close(complete=exc_type is None)
+        return False
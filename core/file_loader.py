@@ -1,22 +1,171 @@
 import os
+import time
 from PyQt6.QtCore import QThread, pyqtSignal
-from utils.audio_utils import is_audio_file, get_audio_duration
+from core.audio_catalog import AudioCatalog
+from core.file_scanner import scan_audio_files, list_directory
+from utils.audio_utils import probe_audio, PROBE_TIERS
+import config
+
+def lookup_or_probe(catalog, file_path, size, mtime, tier_counts=None):
+    # Devuelve la duración desde el catálogo o sondeando el archivo si cambió
+    cached = catalog.lookup(file_path, size, mtime)
+    # Las filas que solo guardan el hash no tienen duración: se sondea igual
+    if cached is not None and cached['tier'] is not None:
+        if tier_counts is not None:
+            tier_counts['catalog'] += 1
+        return cached['duration']
+
+    info = probe_audio(file_path)
+    if tier_counts is not None:
+        tier_counts[info['tier']] += 1
+    # También los que fallan: si no cambian, el diff de la carpeta no los toma como modificados
+    # ni los vuelve a sondear en cada evento del vigilante
+    catalog.store(file_path, size, mtime, info)
+    return info['duration']
 
 class LoadFilesThread(QThread):
-    file_found = pyqtSignal(str, str)
-    
+    # Cada lote es una lista de (ruta, carpeta relativa, duración)
+    files_found = pyqtSignal(list)
+    probe_summary = pyqtSignal(dict)
+    scan_stats = pyqtSignal(int, float)
+    directories_found = pyqtSignal(list)
+    fingerprint_report = pyqtSignal(dict)
+
     def __init__(self, directory):
         super().__init__()
-        self.directory = directory
-    
+        self.directory = os.path.normpath(directory)
+        self.tier_counts = {tier: 0 for tier in ('catalog',) + PROBE_TIERS + ('error',)}
+        self.seen_paths = set()
+        self.catalog = None
+
     def run(self):
-        for root, dirs, files in os.walk(self.directory):
+        self.catalog = AudioCatalog()
+        try:
+            stats = scan_audio_files(self.directory, self.on_batch, self.isInterruptionRequested)
+            if stats is not None and not self.isInterruptionRequested():
+                # Solo se eliminan entradas si el recorrido terminó completo
+                self.catalog.evict_missing(self.directory, self.seen_paths)
+                self.catalog.set_setting('last_folder', self.directory)
+                self.scan_stats.emit(stats['files'], stats['files_per_second'])
+                self.directories_found.emit(stats['directories'])
+                if config.FINGERPRINT_ENABLED and config.FINGERPRINT_ON_SCAN:
+                    self.fingerprint_files()
+        finally:
+            self.catalog.close()
+        self.probe_summary.emit(dict(self.tier_counts))
+
+    def fingerprint_files(self):
+        # Después del listado, para que la lista de archivos aparezca sin esperar a decodificar
+        from core.fingerprint import ensure_fingerprint
+
+        costs = []
+        start_time = time.perf_counter()
+        for file_path in sorted(self.seen_paths):
+            if self.isInterruptionRequested():
+                break
+            try:
+                cost = ensure_fingerprint(self.catalog, file_path)[3]
+            except (OSError, RuntimeError) as e:
+                print(f"No se pudo calcular la huella de {file_path}: {e}")
+                continue
+            if cost:
+                costs.append((file_path, cost))
+                print(f"Huella de {os.path.basename(file_path)}: {cost:.2f}s")
+        self.fingerprint_report.emit({
+            'files': len(self.seen_paths),
+            'computed': len(costs),
+            'elapsed': time.perf_counter() - start_time,
+            'costs': costs
+        })
+
+    def on_batch(self, batch):
+        found = []
+        for file_path, relative_path, size, mtime in batch:
             if self.isInterruptionRequested():
                 return
-            for file in files:
+            self.seen_paths.add(file_path)
+            found.append((file_path, relative_path, lookup_or_probe(self.catalog, file_path, size, mtime, self.tier_counts)))
+        self.catalog.commit()
+        self.files_found.emit(found)
+
+class FolderDiffThread(QThread):
+    # Compara solo las carpetas que cambiaron contra los archivos ya cargados
+    diff_ready = pyqtSignal(list, list, list, list)
+
+    def __init__(self, directory, changed_dirs, known_paths, watched_dirs):
+        super().__init__()
+        self.directory = os.path.normpath(directory)
+        self.changed_dirs = changed_dirs
+        self.known_paths = known_paths
+        self.watched_dirs = watched_dirs
+
+    def run(self):
+        added = []
+        modified = []
+        removed = set()
+        new_dirs = []
+        catalog = AudioCatalog()
+        try:
+            for changed_dir in self.changed_dirs:
                 if self.isInterruptionRequested():
                     return
-                if is_audio_file(file):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(root, self.directory)
-                    self.file_found.emit(file_path, relative_path)
\ No newline at end of file
+                if not os.path.isdir(changed_dir):
+                    prefix = os.path.join(changed_dir, '')
+                    removed.update(path for path in self.known_paths if path.startswith(prefix))
+                    continue
+
+                files, subdirs = list_directory(changed_dir, '.')
+                listed = set()
+                for file_path, _, size, mtime in files:
+                    listed.add(file_path)
+                    relative_path = self.relative_dir(file_path)
+                    if file_path not in self.known_paths:
+                        added.append((file_path, relative_path, lookup_or_probe(catalog, file_path, size, mtime)))
+                    elif catalog.lookup(file_path, size, mtime) is None:
+                        # Tamaño o fecha distintos: por ejemplo, una grabación que se sigue escribiendo
+                        modified.append((file_path, relative_path, lookup_or_probe(catalog, file_path, size, mtime)))
+
+                removed.update(self.find_removed(changed_dir, listed))
+
+                for subdir, _ in subdirs:
+                    subdir = os.path.normpath(subdir)
+                    if subdir not in self.watched_dirs:
+                        added.extend(self.scan_new_directory(catalog, subdir, new_dirs))
+            catalog.commit()
+        finally:
+            catalog.close()
+
+        self.diff_ready.emit(added, sorted(removed), modified, new_dirs)
+
+    def find_removed(self, changed_dir, listed):
+        # Archivos que ya no están en la carpeta o cuya subcarpeta fue borrada o renombrada
+        prefix = os.path.join(changed_dir, '')
+        existing_dirs = {}
+        for path in self.known_paths:
+            if not path.startswith(prefix):
+                continue
+            parent = os.path.dirname(path)
+            if parent == changed_dir:
+                if path not in listed:
+                    yield path
+            else:
+                if parent not in existing_dirs:
+                    existing_dirs[parent] = os.path.isdir(parent)
+                if not existing_dirs[parent]:
+                    yield path
+
+    def scan_new_directory(self, catalog, subdir, new_dirs):
+        found = []
+
+        def on_batch(batch):
+            for file_path, _, size, mtime in batch:
+                if file_path not in self.known_paths:
+                    found.append((file_path, self.relative_dir(file_path), lookup_or_probe(catalog, file_path, size, mtime)))
+
+        stats = scan_audio_files(subdir, on_batch, self.isInterruptionRequested)
+        if stats is not None:
+            new_dirs.extend(stats['directories'])
+        return found
+
+    def relative_dir(self, file_path):
+        return os.path.relpath(os.path.dirname(file_path), self.directory)
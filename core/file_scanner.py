@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.audio_utils import is_audio_file
+
+DEFAULT_SCAN_WORKERS = 8
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_BATCH_INTERVAL = 0.25  # segundos
+
+def list_directory(path, relative_path):
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_relative = entry.name if relative_path == '.' else os.path.join(relative_path, entry.name)
+                        subdirs.append((entry.path, sub_relative))
+                    elif entry.is_file() and is_audio_file(entry.name):
+                        # En Windows scandir ya trae el stat, en el resto se hace en este hilo del pool
+                        stat = entry.stat()
+                        files.append((os.path.normpath(entry.path), relative_path, stat.st_size, stat.st_mtime))
+                except OSError as e:
+                    print(f"Error al leer {entry.path}: {e}")
+    except OSError as e:
+        print(f"Error al listar {path}: {e}")
+    return files, subdirs
+
+def scan_audio_files(directory, on_batch, should_stop=lambda: False, max_workers=DEFAULT_SCAN_WORKERS,
+                     batch_size=DEFAULT_BATCH_SIZE, batch_interval=DEFAULT_BATCH_INTERVAL):
+    # Lista los subdirectorios en paralelo y entrega los archivos en lotes de
+    # (ruta, carpeta relativa, tamaño, mtime). Devuelve None si se canceló.
+    start_time = time.perf_counter()
+    total_files = 0
+    directories = [os.path.normpath(directory)]
+    batch = []
+    last_flush = start_time
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {executor.submit(list_directory, os.path.normpath(directory), '.')}
+    try:
+        while pending:
+            if should_stop():
+                for future in pending:
+                    future.cancel()
+                return None
+
+            done, pending = wait(pending, timeout=batch_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                for subdir, relative_path in subdirs:
+                    directories.append(os.path.normpath(subdir))
+                    pending.add(executor.submit(list_directory, subdir, relative_path))
+                batch.extend(files)
+
+            now = time.perf_counter()
+            while len(batch) >= batch_size:
+                on_batch(batch[:batch_size])
+                total_files += batch_size
+                batch = batch[batch_size:]
+                last_flush = now
+            if batch and now - last_flush >= batch_interval:
+                on_batch(batch)
+                total_files += len(batch)
+                batch = []
+                last_flush = now
+
+        if batch:
+            on_batch(batch)
+            total_files += len(batch)
+    finally:
+        executor.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        'files': total_files,
+        'directories': directories,
+        'elapsed': elapsed,
+        'files_per_second': total_files / elapsed if elapsed > 0 else 0
+    }
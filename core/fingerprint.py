@@ -0,0 +1,159 @@
+import re
+import time
+import config
+from core.pcm_cache import load_pcm, SAMPLE_RATE
+
+# Huella espectral para encontrar grabaciones casi idénticas (re-codificadas o con silencios
+# recortados). Cada cuadro de 0,256 s da 32 bits: el signo de la variación de energía entre
+# bandas vecinas de 300 a 2000 Hz respecto del cuadro anterior. Sobrevive a la compresión con
+# pérdida, y al comparar dos huellas se busca el desfase que mejor las alinea.
+# Los cuadros se solapan mucho (uno cada 16 ms) para que un recorte que no cae justo en un
+# cuadro siga alineando bien; por eso se trabaja a 4 kHz, suficiente para bandas hasta 2 kHz.
+
+DECIMATION = 4
+FINGERPRINT_RATE = SAMPLE_RATE // DECIMATION
+FRAME_SIZE = 1024
+HOP_SIZE = 64
+NUM_BANDS = 33
+MIN_FREQUENCY = 300
+MAX_FREQUENCY = 2000
+BLOCK_FRAMES = 4096
+
+# Valores que se repiten más que esto (silencio, tonos) no sirven para votar el desfase
+MAX_VALUE_OCCURRENCES = 8
+
+def compute_fingerprint(audio):
+    # audio: float32 a 16 kHz (puede ser el memmap de la caché PCM)
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    decimated_length = len(audio) // DECIMATION
+    if decimated_length < FRAME_SIZE + HOP_SIZE:
+        return np.zeros(0, dtype=np.uint32)
+
+    num_frames = 1 + (decimated_length - FRAME_SIZE) // HOP_SIZE
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+
+    # Matriz (frecuencias x bandas) para sumar la potencia de cada banda con un producto
+    frequencies = np.fft.rfftfreq(FRAME_SIZE, 1 / FINGERPRINT_RATE)
+    edges = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, NUM_BANDS + 1)
+    band_of = np.digitize(frequencies, edges) - 1
+    bands = np.zeros((len(frequencies), NUM_BANDS), dtype=np.float32)
+    valid = (band_of >= 0) & (band_of < NUM_BANDS)
+    bands[np.nonzero(valid)[0], band_of[valid]] = 1
+
+    # Por bloques, para no materializar todo el audio de una grabación larga a la vez
+    energies = np.empty((num_frames, NUM_BANDS), dtype=np.float32)
+    for start in range(0, num_frames, BLOCK_FRAMES):
+        count = min(BLOCK_FRAMES, num_frames - start)
+        first = start * HOP_SIZE
+        last = first + (count - 1) * HOP_SIZE + FRAME_SIZE
+        # Promediar de a 4 muestras hace de filtro pasabajos antes de bajar a 4 kHz
+        chunk = np.asarray(audio[first * DECIMATION:last * DECIMATION], dtype=np.float32)
+        chunk = chunk.reshape(-1, DECIMATION).mean(axis=1)
+        block = sliding_window_view(chunk, FRAME_SIZE)[::HOP_SIZE] * window
+        spectrum = np.fft.rfft(block, axis=1)
+        energies[start:start + count] = (spectrum.real ** 2 + spectrum.imag ** 2) @ bands
+
+    band_diff = energies[:, :-1] - energies[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    weights = (1 << np.arange(NUM_BANDS - 1, dtype=np.uint64))
+    return (bits @ weights).astype(np.uint32)
+
+def find_best_offset(a, b):
+    # Desfase (en cuadros) más votado entre sub-huellas idénticas: b[i + desfase] ~ a[i]
+    import numpy as np
+
+    order = np.argsort(b, kind='stable')
+    sorted_b = b[order]
+    left = np.searchsorted(sorted_b, a, side='left')
+    counts = np.searchsorted(sorted_b, a, side='right') - left
+    mask = (counts > 0) & (counts <= MAX_VALUE_OCCURRENCES)
+    if not mask.any():
+        return 0
+
+    counts = counts[mask]
+    a_index = np.repeat(np.nonzero(mask)[0], counts)
+    first = np.repeat(left[mask], counts)
+    within = np.arange(len(a_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+    offsets = order[first + within] - a_index
+    values, votes = np.unique(offsets, return_counts=True)
+    return int(values[np.argmax(votes)])
+
+def compare_fingerprints(a, b):
+    # Devuelve (similitud 0..1, desfase en cuadros, fracción de la huella más corta que se solapa)
+    import numpy as np
+
+    if len(a) == 0 or len(b) == 0:
+        return 0.0, 0, 0.0
+
+    offset = find_best_offset(a, b)
+    a_start = max(0, -offset)
+    b_start = max(0, offset)
+    length = min(len(a) - a_start, len(b) - b_start)
+    if length <= 0:
+        return 0.0, offset, 0.0
+
+    different = np.bitwise_xor(a[a_start:a_start + length], b[b_start:b_start + length])
+    bit_errors = np.unpackbits(different.view(np.uint8)).sum()
+    similarity = 1 - bit_errors / (length * 32)
+    return float(similarity), offset, length / min(len(a), len(b))
+
+def frames_to_seconds(frames):
+    return frames * HOP_SIZE / FINGERPRINT_RATE
+
+def ensure_fingerprint(catalog, file_path):
+    # Devuelve (hash del contenido, huella, duración, segundos gastados; 0 si ya estaba en el índice)
+    import numpy as np
+
+    content_hash = catalog.get_content_hash(file_path)
+    row = catalog.get_fingerprint(content_hash)
+    if row is not None:
+        return content_hash, np.frombuffer(row['fingerprint'], dtype=np.uint32), row['duration'], 0.0
+
+    start_time = time.perf_counter()
+    audio = load_pcm(file_path, content_hash)
+    fingerprint = compute_fingerprint(audio)
+    compute_time = time.perf_counter() - start_time
+    duration = len(audio) / SAMPLE_RATE
+    catalog.store_fingerprint(content_hash, duration, fingerprint.tobytes(), compute_time)
+    return content_hash, fingerprint, duration, compute_time
+
+def find_near_duplicate(catalog, content_hash, fingerprint, duration, accept=None, threshold=None):
+    # Busca en el índice una grabación casi idéntica de duración parecida.
+    # accept(hash) filtra candidatos (por ejemplo, solo los que ya tienen transcripción).
+    # Devuelve (hash, similitud, desfase en segundos a sumar a sus tiempos) o None.
+    import numpy as np
+
+    if threshold is None:
+        threshold = config.NEAR_DUPLICATE_THRESHOLD
+    tolerance = duration * config.NEAR_DUPLICATE_DURATION_TOLERANCE + 30
+    best = None
+    for row in catalog.fingerprints_between(duration - tolerance, duration + tolerance):
+        if row['content_hash'] == content_hash or (accept is not None and not accept(row['content_hash'])):
+            continue
+        candidate = np.frombuffer(row['fingerprint'], dtype=np.uint32)
+        similarity, offset, coverage = compare_fingerprints(fingerprint, candidate)
+        if similarity < threshold or coverage < 0.8:
+            continue
+        if best is None or similarity > best[1]:
+            # Los tiempos del candidato van adelantados 'offset' cuadros respecto de este audio
+            best = (row['content_hash'], similarity, -frames_to_seconds(offset))
+    return best
+
+_TIMESTAMP_PATTERN = re.compile(r"\[(\d+):(\d{2}):(\d{2}) -> (\d+):(\d{2}):(\d{2})\]")
+
+def shift_transcript_text(text, shift_seconds):
+    # Corrige los tiempos de una transcripción reutilizada de un audio con distinto recorte inicial
+    from utils.audio_utils import format_duration
+
+    if abs(shift_seconds) < 1:
+        return text
+
+    def shift(match):
+        h1, m1, s1, h2, m2, s2 = map(int, match.groups())
+        start = max(0, h1 * 3600 + m1 * 60 + s1 + shift_seconds)
+        end = max(0, h2 * 3600 + m2 * 60 + s2 + shift_seconds)
+        return f"[{format_duration(start)} -> {format_duration(end)}]"
+
+    return _TIMESTAMP_PATTERN.sub(shift, text)
@@ -0,0 +1,126 @@
+import os
+import time
+import shutil
+import subprocess
+import config
+from core.audio_catalog import AudioCatalog
+from core.pcm_cache import get_pcm_cache, SAMPLE_RATE
+
+# Identificación de idioma previa a la transcripción. Con "Auto" el modelo grande detecta el
+# idioma de cada archivo por su cuenta; aquí lo hace un modelo pequeño con una muestra de voz,
+# el resultado se guarda en el catálogo por hash del contenido y el lote se agrupa por idioma.
+
+def read_sample(input_path, seconds, content_hash=None):
+    # Primeros 'seconds' del audio en float32 a 16 kHz. Solo se decodifica la muestra: decodificar
+    # el archivo entero a la caché PCM aquí llenaría la caché antes de transcribir nada.
+    # Si el archivo ya está en la caché (content_hash dado), se lee de ahí.
+    import numpy as np
+
+    if content_hash is not None and config.PCM_CACHE_ENABLED:
+        audio = get_pcm_cache().peek(content_hash)
+        if audio is not None:
+            return np.array(audio[:int(seconds * SAMPLE_RATE)])
+
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        # El decodificador de faster-whisper no admite un límite: decodifica todo y se recorta
+        from faster_whisper import decode_audio
+        return decode_audio(input_path, sampling_rate=SAMPLE_RATE)[:int(seconds * SAMPLE_RATE)]
+    command = [ffmpeg, '-nostdin', '-v', 'error', '-t', str(seconds), '-i', input_path,
+               '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-']
+    data = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+    return np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)
+
+def detect_language(model, audio):
+    # Devuelve (idioma, probabilidad) o None si la muestra no tiene voz
+    from core.speech_segments import get_speech_chunks, collect_speech
+
+    chunks = get_speech_chunks(audio)
+    if not chunks:
+        return None
+    # transcribe() detecta el idioma antes de devolver el generador; los segmentos no se decodifican
+    _, info = model.transcribe(collect_speech(audio, chunks), beam_size=1, vad_filter=False)
+    return info.language, info.language_probability
+
+def identify_languages(files, use_pcm_cache=True):
+    # files: lista de (ruta, carpeta relativa). Devuelve ({ruta: (idioma, probabilidad)}, informe)
+    # use_pcm_cache: leer la muestra de la caché PCM si el archivo ya está decodificado
+    detections = {}
+    report = {'files': len(files), 'cached': 0, 'detected': 0, 'errors': 0, 'elapsed': 0.0}
+    start_time = time.perf_counter()
+    model = None
+    catalog = AudioCatalog()
+    try:
+        for input_path, _ in files:
+            try:
+                content_hash = catalog.get_content_hash(input_path)
+                cached = catalog.get_language(content_hash, config.LANGUAGE_ID_MODEL)
+            except Exception as e:
+                print(f"No se pudo identificar el idioma de {input_path}: {e}")
+                report['errors'] += 1
+                continue
+            if cached is not None:
+                report['cached'] += 1
+                if cached[0] is not None:
+                    detections[input_path] = cached
+                continue
+
+            # Si el modelo no carga, falla la identificación entera y no cada archivo
+            if model is None:
+                from core.whisper_model import get_language_id_model
+                model = get_language_id_model()
+            try:
+                sample = read_sample(input_path, config.LANGUAGE_ID_SAMPLE_SECONDS, content_hash if use_pcm_cache else None)
+                detection = detect_language(model, sample)
+            except ImportError:
+                raise
+            except Exception as e:
+                # Un archivo que no se puede leer ni analizar no detiene el lote: queda en "Auto"
+                print(f"No se pudo identificar el idioma de {input_path}: {e}")
+                report['errors'] += 1
+                continue
+
+            report['detected'] += 1
+            language, probability = detection if detection is not None else (None, 0.0)
+            # También se guarda la falta de voz, para no volver a muestrear el archivo
+            catalog.store_language(content_hash, config.LANGUAGE_ID_MODEL, language, probability)
+            if language is not None:
+                detections[input_path] = (language, probability)
+    finally:
+        catalog.close()
+    report['elapsed'] = time.perf_counter() - start_time
+    return detections, report
+
+def group_by_language(files, detections, min_probability=None):
+    # Devuelve [(idioma o None, archivos)], los grupos más grandes primero. None agrupa los
+    # archivos sin detección fiable, que se transcriben con detección automática.
+    if min_probability is None:
+        min_probability = config.LANGUAGE_ID_MIN_PROBABILITY
+    groups = {}
+    for item in files:
+        detection = detections.get(item[0])
+        language = detection[0] if detection is not None and detection[1] >= min_probability else None
+        groups.setdefault(language, []).append(item)
+    return sorted(groups.items(), key=lambda group: (group[0] is None, -len(group[1])))
+
+def plan_language_groups(files, use_pcm_cache=True):
+    # Devuelve (grupos, informe); sin faster-whisper todo queda en un solo grupo automático
+    if not config.LANGUAGE_ID_ENABLED or not files:
+        return [(None, files)], None
+    try:
+        detections, report = identify_languages(files, use_pcm_cache)
+    except ImportError:
+        print("La identificación de idioma necesita faster-whisper; se usa la detección del modelo principal")
+        return [(None, files)], None
+    except Exception as e:
+        # Sin identificación el lote se transcribe igual, con la detección del modelo principal
+        print(f"No se pudo identificar los idiomas: {e}")
+        return [(None, files)], None
+
+    groups = group_by_language(files, detections)
+    report['languages'] = {language: len(group) for language, group in groups if language is not None}
+    report['low_confidence'] = sum(len(group) for language, group in groups if language is None)
+    for language, group in groups:
+        names = ", ".join(os.path.basename(input_path) for input_path, _ in group[:3])
+        print(f"Idioma {language or 'automático'}: {len(group)} archivos ({names}{', ...' if len(group) > 3 else ''})")
+    return groups, report
@@ -0,0 +1,149 @@
+import gc
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+def _current_memory_usage(device):
+    if device.startswith("cuda") and 'torch' in sys.modules:
+        import torch
+        return torch.cuda.memory_allocated()
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+# Bytes por peso de cada tipo de cómputo de CTranslate2, relativos al float16 con que se publican los modelos
+CTRANSLATE2_WEIGHT_SCALE = {
+    'float32': 2.0, 'float16': 1.0, 'bfloat16': 1.0,
+    'int8': 0.5, 'int8_float32': 0.5, 'int8_float16': 0.5, 'int8_bfloat16': 0.5
+}
+
+def ctranslate2_model_size(model_dir, compute_type):
+    # CTranslate2 reserva su memoria fuera de torch y torch.cuda.memory_allocated no la ve:
+    # se estima con el tamaño de los pesos en disco convertido al tipo de cómputo
+    weights_path = os.path.join(model_dir, "model.bin")
+    if not os.path.isfile(weights_path):
+        return None
+    return int(os.path.getsize(weights_path) * CTRANSLATE2_WEIGHT_SCALE.get(compute_type, 1.0))
+
+class CachedModel:
+    __slots__ = ('model', 'size_bytes', 'load_time', 'pinned')
+
+    def __init__(self, model, size_bytes, load_time):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_time = load_time
+        self.pinned = False
+
+class ModelCache:
+    # Caché LRU de modelos cargados, con clave (motor, modelo, dispositivo, tipo de cómputo)
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_load_time = 0.0
+
+    def get(self, key, loader, estimate_size=None):
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.model
+
+                # Si otro hilo ya está cargando este modelo, esperar esa misma carga
+                loading = self.loading.get(key)
+                if loading is None:
+                    loading = self.loading[key] = threading.Event()
+                    break
+            loading.wait()
+
+        try:
+            device = key[2]
+            memory_before = _current_memory_usage(device)
+            start_time = time.time()
+            model = loader()
+            load_time = time.time() - start_time
+            size_bytes = max(0, _current_memory_usage(device) - memory_before)
+            if estimate_size is not None:
+                # Los modelos cuya memoria no se puede medir traen su propia estimación
+                estimated = estimate_size()
+                if estimated is not None:
+                    size_bytes = estimated
+
+            with self.lock:
+                self.misses += 1
+                self.total_load_time += load_time
+                self.entries[key] = CachedModel(model, size_bytes, load_time)
+                self.evict_to_budget(keep=key)
+            return model
+        finally:
+            with self.lock:
+                self.loading.pop(key).set()
+
+    def is_loaded(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def is_loading(self, key):
+        with self.lock:
+            return key in self.loading
+
+    def evict_to_budget(self, keep=None):
+        with self.lock:
+            for key in list(self.entries):
+                if self.used_bytes() <= self.budget_bytes:
+                    break
+                entry = self.entries[key]
+                if key == keep or entry.pinned:
+                    continue
+                self.remove(key)
+
+    def remove(self, key):
+        with self.lock:
+            if self.entries.pop(key, None) is None:
+                return
+            self.evictions += 1
+        gc.collect()
+        if key[2].startswith("cuda") and 'torch' in sys.modules:
+            import torch
+            torch.cuda.empty_cache()
+        print(f"Modelo descargado de la caché: {key}")
+
+    def pin(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries[key].pinned = True
+
+    def unpin(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries[key].pinned = False
+            self.evict_to_budget()
+
+    def used_bytes(self):
+        return sum(entry.size_bytes for entry in self.entries.values())
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.evict_to_budget()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'total_load_time': self.total_load_time,
+                'used_bytes': self.used_bytes(),
+                'budget_bytes': self.budget_bytes,
+                'models': [(key, entry.size_bytes, entry.load_time, entry.pinned) for key, entry in self.entries.items()]
+            }
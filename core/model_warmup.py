@@ -0,0 +1,36 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.whisper_model import get_whisper_model
+
+WARMUP_SAMPLE_RATE = 16000
+
+def run_dummy_inference(model, model_type):
+    # Un segundo de silencio alcanza para inicializar el asignador de memoria y los pools de hilos
+    import numpy as np
+
+    silence = np.zeros(WARMUP_SAMPLE_RATE, dtype=np.float32)
+    if model_type == "faster":
+        segments, _ = model.transcribe(silence, beam_size=1, vad_filter=False)
+        list(segments)
+    else:
+        model({"raw": silence, "sampling_rate": WARMUP_SAMPLE_RATE})
+
+class ModelWarmupThread(QThread):
+    state_changed = pyqtSignal(str, str)
+    model_ready = pyqtSignal(str)
+
+    def __init__(self, model_type):
+        super().__init__()
+        self.model_type = model_type
+
+    def run(self):
+        self.state_changed.emit(self.model_type, "loading")
+        try:
+            # Si la carga ya está en curso en otro hilo, get_whisper_model espera esa misma carga
+            model = get_whisper_model(self.model_type)
+            run_dummy_inference(model, self.model_type)
+        except Exception as e:
+            print(f"Error al precargar el modelo {self.model_type}: {str(e)}")
+            self.state_changed.emit(self.model_type, "error")
+            return
+        self.state_changed.emit(self.model_type, "ready")
+        self.model_ready.emit(self.model_type)
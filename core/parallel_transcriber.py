@@ -0,0 +1,414 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.transcription_engine import get_output_path, build_job_options, transcribe_file, write_segments
+from core.checkpoint import JobManifest, SegmentWriter, job_signature
+from core.result_cache import ResultCacheSession
+from core.pcm_cache import load_pcm, SAMPLE_RATE
+from core.sharding import count_shards, plan_shards, merge_shard_segments
+from core.streaming import stream_segments
+from core.progress import ProgressBus, ProgressTracker
+from core.language_id import plan_language_groups, detect_language
+from core.assisted_decoding import enable_assisted_decoding
+from core.adaptive_beam import new_stats, merge_stats
+from utils.audio_utils import get_audio_duration
+import config
+
+# Modelo de cada proceso de trabajo. En los modos compartidos lo carga el proceso
+# principal una sola vez y los trabajadores usan esa misma copia.
+_worker_model = None
+_worker_model_type = None
+# Cola por la que los trabajadores envían sus ProgressEvent al proceso principal
+_progress_queue = None
+
+def init_worker(model_type, cpu_threads, progress_queue=None):
+    global _worker_model, _worker_model_type, _progress_queue
+    from core.whisper_model import load_faster_whisper_model, load_original_whisper_model
+
+    _progress_queue = progress_queue
+    _worker_model_type = model_type
+    if model_type == "faster-whisper":
+        _worker_model = load_faster_whisper_model(cpu_threads=cpu_threads)
+    else:
+        import torch
+        torch.set_num_threads(cpu_threads)
+        _worker_model = load_original_whisper_model()
+
+def init_shared_memory_worker(model_type, model, cpu_threads, progress_queue=None):
+    # Los tensores del modelo llegan por memoria compartida desde el proceso principal:
+    # el proceso nuevo arranca limpio (spawn) y solo arma el pipeline alrededor de ellos
+    global _worker_model, _worker_model_type, _progress_queue
+    import torch
+    from core.whisper_model import build_original_pipeline
+
+    _progress_queue = progress_queue
+    torch.set_num_threads(cpu_threads)
+    _worker_model_type = model_type
+    _worker_model = build_original_pipeline(model)
+
+def load_shared_model(model_type, workers, cpu_threads):
+    global _worker_model, _worker_model_type
+    from core.whisper_model import load_faster_whisper_model, load_original_whisper_model
+
+    _worker_model_type = model_type
+    if model_type == "faster-whisper":
+        # CTranslate2 comparte los pesos entre sus réplicas del mismo dispositivo
+        _worker_model = load_faster_whisper_model(cpu_threads=cpu_threads, num_workers=workers)
+    else:
+        _worker_model = load_original_whisper_model()
+
+def release_shared_model():
+    global _worker_model, _worker_model_type
+    _worker_model = None
+    _worker_model_type = None
+
+def get_memory_report():
+    try:
+        import psutil
+    except ImportError:
+        return {'pid': os.getpid(), 'rss': 0, 'uss': 0, 'pss': 0}
+    info = psutil.Process().memory_full_info()
+    # PSS reparte las páginas compartidas entre los procesos que las usan (solo Linux)
+    return {'pid': os.getpid(), 'rss': info.rss, 'uss': getattr(info, 'uss', 0), 'pss': getattr(info, 'pss', 0)}
+
+def publish_progress(event):
+    if _progress_queue is not None:
+        _progress_queue.put(event)
+
+def forward_progress(progress_queue, publish):
+    # Hilo del proceso principal que pasa los eventos de los trabajadores al bus
+    for event in iter(progress_queue.get, None):
+        publish(event)
+
+def transcribe_in_worker(input_path, output_path, job):
+    # La duración real la completa transcribe_file al preparar el audio
+    tracker = ProgressTracker(publish_progress, input_path, 0.0)
+    counter = None
+    if job.get('assisted_decoding') and _worker_model_type == "original-whisper":
+        counter = enable_assisted_decoding(_worker_model)
+        before = counter.snapshot()
+    stats = new_stats() if job.get('adaptive_beam') else None
+    transcription_time, audio_duration = transcribe_file(_worker_model, _worker_model_type, input_path, output_path, job,
+                                                         progress=tracker, stats=stats)
+    # Los informes por archivo vuelven con el resultado para mostrarlos en la ventana
+    reports = {}
+    if counter is not None:
+        reports['decoding'] = counter.report(before)
+    if stats is not None:
+        reports['escalation'] = stats
+    return input_path, transcription_time, audio_duration, get_memory_report(), reports
+
+def transcribe_shard_in_worker(input_path, shard_index, start_sample, end_sample, job):
+    # La parte se lee del memmap de la caché PCM por ventanas, igual que un archivo muy largo:
+    # la memoria no depende de lo larga que sea la parte
+    start_time = time.time()
+    stats = new_stats() if job.get('adaptive_beam') else None
+    segments = list(stream_segments(_worker_model, _worker_model_type, input_path, job, start_sample, end_sample, stats))
+    return input_path, shard_index, segments, start_time, time.time(), get_memory_report(), stats
+
+def detect_language_in_worker(input_path):
+    # Idioma de un archivo cortado que sigue en "Auto", detectado una sola vez con el modelo principal
+    # para que todas sus partes usen el mismo
+    import numpy as np
+
+    audio = np.array(load_pcm(input_path)[:int(config.LANGUAGE_ID_SAMPLE_SECONDS * SAMPLE_RATE)])
+    detection = detect_language(_worker_model, audio)
+    return detection[0] if detection is not None else None
+
+def wants_shards(duration, workers):
+    return config.SHARD_LONG_FILES and config.PCM_CACHE_ENABLED and count_shards(duration, workers, config.SHARD_MIN_SECONDS) > 1
+
+def plan_file_shards(input_path, duration, workers):
+    # Devuelve los rangos en muestras de cada parte, o None si el archivo se transcribe entero
+    if not wants_shards(duration, workers):
+        return None
+    num_shards = count_shards(duration, workers, config.SHARD_MIN_SECONDS)
+    try:
+        from core.speech_segments import get_speech_chunks
+        audio = load_pcm(input_path)
+        shards = plan_shards(get_speech_chunks(audio), len(audio), num_shards)
+    except ImportError:
+        # El VAD viene con faster-whisper; sin él no se puede cortar en silencios
+        return None
+    return shards if len(shards) > 1 else None
+
+def iter_completed(futures):
+    # Como as_completed, pero también espera los futuros que se agregan a 'futures' mientras se recorre
+    finished = set()
+    while len(finished) < len(futures):
+        done, _ = wait([future for future in futures if future not in finished], return_when=FIRST_COMPLETED)
+        for future in done:
+            finished.add(future)
+            yield future
+
+def partition_cpu_threads(workers):
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def choose_sharing_mode(model_type, share_weights):
+    if not share_weights:
+        return "none"
+    if model_type == "faster-whisper":
+        return "threads"
+    # No se usa fork: este proceso ya tiene hilos de Qt, torch, OpenMP y CTranslate2, y un
+    # proceso hijo podría quedar bloqueado en un lock tomado en el momento del fork. Los
+    # trabajadores se crean con spawn y reciben los pesos por memoria compartida (solo en CPU).
+    import torch
+    if not torch.cuda.is_available():
+        return "shared-memory"
+    return "none"
+
+class ParallelTranscriptionThread(QThread):
+    transcription_done = pyqtSignal(str, float, float)
+    all_transcriptions_done = pyqtSignal()
+    throughput_report = pyqtSignal(int, float)
+    memory_report = pyqtSignal(str, list)
+    cached_result = pyqtSignal(str)
+    cache_report = pyqtSignal(dict)
+    language_report = pyqtSignal(dict)
+    decoding_report = pyqtSignal(str, dict)
+    escalation_report = pyqtSignal(str, dict)
+
+    def __init__(self, files, language, translate, transcription_options, auto_detect, base_output_dir, model_type, workers, share_weights=True,
+                 progress_bus=None):
+        super().__init__()
+        # Lista de (ruta del archivo, carpeta relativa)
+        self.files = files
+        self.job = build_job_options(language, translate, auto_detect, transcription_options)
+        self.base_output_dir = base_output_dir
+        self.model_type = model_type
+        self.workers = workers
+        self.share_weights = share_weights
+        self.progress_bus = progress_bus or ProgressBus()
+
+    def create_progress_queue(self, sharing_mode):
+        global _progress_queue
+        if sharing_mode == "threads":
+            _progress_queue = queue.Queue()
+            return _progress_queue
+        return multiprocessing.get_context("spawn").Queue()
+
+    def create_executor(self, sharing_mode, cpu_threads, progress_queue):
+        if sharing_mode == "threads":
+            load_shared_model(self.model_type, self.workers, cpu_threads)
+            return ThreadPoolExecutor(max_workers=self.workers)
+        if sharing_mode == "shared-memory":
+            # torch.multiprocessing envía los tensores en memoria compartida en vez de copiarlos;
+            # el modelo sigue vivo en este proceso hasta que se cierra el ejecutor
+            import torch.multiprocessing
+            load_shared_model(self.model_type, self.workers, cpu_threads)
+            model = _worker_model.model
+            model.share_memory()
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=torch.multiprocessing.get_context("spawn"),
+                                       initializer=init_shared_memory_worker,
+                                       initargs=(self.model_type, model, cpu_threads, progress_queue))
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=init_worker, initargs=(self.model_type, cpu_threads, progress_queue))
+
+    def run(self):
+        start_time = time.time()
+
+        get_output = lambda input_path, relative_path: get_output_path(self.base_output_dir, relative_path, input_path)
+        signature = job_signature(self.model_type, self.job)
+        manifest = JobManifest(self.base_output_dir)
+        files, skipped = manifest.pending(self.files, get_output, signature)
+        if skipped:
+            print(f"{skipped} archivos ya estaban transcritos, se omiten")
+            pending_paths = {input_path for input_path, _ in files}
+            for input_path, _ in self.files:
+                if input_path not in pending_paths:
+                    self.progress_bus.mark_finished(input_path)
+
+        def file_from_cache(input_path, output_path):
+            manifest.mark_done(input_path, output_path, signature)
+            self.progress_bus.mark_finished(input_path)
+            self.cached_result.emit(input_path)
+
+        result_cache = None
+        if config.RESULT_CACHE_ENABLED:
+            result_cache = ResultCacheSession(self.model_type, self.job, get_output)
+            files, materialised = result_cache.partition(files)
+            for input_path, output_path in materialised:
+                file_from_cache(input_path, output_path)
+
+        # Con "Auto" se fuerza el idioma identificado de cada archivo; así tampoco lo detecta
+        # por separado cada parte de un archivo cortado
+        file_jobs = {}
+        if self.job['language'] is None and files:
+            groups, report = plan_language_groups(files)
+            if report is not None:
+                self.language_report.emit(report)
+            for language, group in groups:
+                for input_path, _ in group:
+                    file_jobs[input_path] = self.job if language is None else dict(self.job, language=language)
+
+        # Los archivos más largos primero, para que ninguno quede solo al final
+        jobs = [(get_audio_duration(input_path), input_path, relative_path) for input_path, relative_path in files]
+        jobs.sort(key=lambda job: job[0], reverse=True)
+
+        cpu_threads = partition_cpu_threads(self.workers)
+        sharing_mode = choose_sharing_mode(self.model_type, self.share_weights)
+        memory_by_pid = {}
+        total_audio = 0.0
+        output_paths = {}
+        progress_queue = self.create_progress_queue(sharing_mode)
+        forwarder = threading.Thread(target=forward_progress, args=(progress_queue, self.progress_bus.publish), daemon=True)
+        forwarder.start()
+        # Los archivos largos se cortan en silencios para repartirlos entre varios procesos. Cortar
+        # exige decodificar y pasar el VAD, así que se planifica en un hilo aparte mientras los
+        # trabajadores ya empiezan con los demás archivos.
+        planner = ThreadPoolExecutor(max_workers=1)
+        try:
+            with self.create_executor(sharing_mode, cpu_threads, progress_queue) as executor:
+                futures = {}
+                plans = {}
+                languages = {}
+                partial = {}
+                shards_by_file = {}
+
+                def submit_file(duration, input_path, shards):
+                    output_path = output_paths[input_path]
+                    job = file_jobs.get(input_path, self.job)
+                    if shards is None:
+                        futures[executor.submit(transcribe_in_worker, input_path, output_path, job)] = input_path
+                        return
+                    if job['language'] is None and self.model_type == "faster-whisper" and input_path not in languages.values():
+                        # Sin idioma fijo cada parte lo detectaría por su cuenta: primero se detecta una vez
+                        future = executor.submit(detect_language_in_worker, input_path)
+                        languages[future] = input_path
+                        plans[future] = (duration, shards)
+                        futures[future] = input_path
+                        return
+                    print(f"{os.path.basename(input_path)}: {len(shards)} partes en paralelo")
+                    shards_by_file[input_path] = shards
+                    # Las partes terminan en cualquier orden; el avance del archivo es la suma de lo hecho
+                    partial[input_path] = {'output_path': output_path, 'duration': duration,
+                                           'results': [None] * len(shards), 'pending': len(shards),
+                                           'start': None, 'end': 0.0, 'failed': False, 'stats': None,
+                                           'tracker': self.progress_bus.tracker(input_path, duration), 'done_seconds': 0.0}
+                    for shard_index, (start_sample, end_sample) in enumerate(shards):
+                        future = executor.submit(transcribe_shard_in_worker, input_path, shard_index,
+                                                 start_sample, end_sample, job)
+                        futures[future] = input_path
+
+                def schedule(duration, input_path, relative_path):
+                    output_paths[input_path] = get_output_path(self.base_output_dir, relative_path, input_path)
+                    if wants_shards(duration, self.workers):
+                        future = planner.submit(plan_file_shards, input_path, duration, self.workers)
+                        plans[future] = (duration, None)
+                        futures[future] = input_path
+                    else:
+                        submit_file(duration, input_path, None)
+
+                def file_failed(input_path):
+                    self.progress_bus.mark_finished(input_path)
+                    # Las copias que esperaban este resultado ya no lo van a recibir: se transcriben
+                    if result_cache is not None:
+                        for retry_path, retry_relative in result_cache.release_failed(input_path):
+                            print(f"Se transcribe {retry_path}, que esperaba el resultado de {input_path}")
+                            schedule(get_audio_duration(retry_path), retry_path, retry_relative)
+
+                for duration, input_path, relative_path in jobs:
+                    schedule(duration, input_path, relative_path)
+
+                for future in iter_completed(futures):
+                    input_path = futures[future]
+                    if future in languages:
+                        duration, shards = plans[future]
+                        try:
+                            language = future.result()
+                        except Exception as e:
+                            print(f"No se pudo detectar el idioma de {input_path}: {str(e)}")
+                            language = None
+                        if language is not None:
+                            file_jobs[input_path] = dict(file_jobs.get(input_path, self.job), language=language)
+                        submit_file(duration, input_path, shards)
+                        continue
+                    if future in plans:
+                        duration = plans[future][0]
+                        try:
+                            shards = future.result()
+                        except Exception as e:
+                            # Sin plan se transcribe entero; si el audio no se puede leer, ahí se informa
+                            print(f"No se pudo cortar {input_path}: {str(e)}")
+                            shards = None
+                        submit_file(duration, input_path, shards)
+                        continue
+
+                    state = partial.get(input_path)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Error en un proceso de transcripción: {str(e)}")
+                        if state is not None:
+                            state['failed'] = True
+                            state['pending'] -= 1
+                        # Un archivo cortado cuenta como terminado cuando vuelve su última parte
+                        if state is None or state['pending'] == 0:
+                            file_failed(input_path)
+                        continue
+
+                    if state is None:
+                        input_path, transcription_time, audio_duration, memory, reports = result
+                        if 'decoding' in reports:
+                            self.decoding_report.emit(input_path, reports['decoding'])
+                        if 'escalation' in reports:
+                            self.escalation_report.emit(input_path, reports['escalation'])
+                    else:
+                        input_path, shard_index, segments, shard_start, shard_end, memory, stats = result
+                        if stats is not None:
+                            state['stats'] = merge_stats(state['stats'] or new_stats(), stats)
+                        state['results'][shard_index] = segments
+                        state['start'] = shard_start if state['start'] is None else min(state['start'], shard_start)
+                        state['end'] = max(state['end'], shard_end)
+                        state['pending'] -= 1
+                        start_sample, end_sample = shards_by_file[input_path][shard_index]
+                        state['done_seconds'] += (end_sample - start_sample) / SAMPLE_RATE
+                        state['tracker'].segment(state['done_seconds'])
+
+                    previous = memory_by_pid.get(memory['pid'])
+                    if previous is None or memory['rss'] > previous['rss']:
+                        memory_by_pid[memory['pid']] = memory
+
+                    if state is not None:
+                        if state['pending'] > 0:
+                            continue
+                        if state['failed']:
+                            print(f"No se escribió la transcripción de {input_path}: falló alguna de sus partes")
+                            file_failed(input_path)
+                            continue
+                        segments, duplicates = merge_shard_segments(state['results'])
+                        with SegmentWriter(state['output_path']) as writer:
+                            write_segments(segments, writer)
+                        if duplicates:
+                            print(f"{os.path.basename(input_path)}: {duplicates} repeticiones quitadas en los cortes")
+                        state['tracker'].finish()
+                        if state['stats'] is not None:
+                            self.escalation_report.emit(input_path, state['stats'])
+                        transcription_time = state['end'] - state['start']
+                        audio_duration = state['duration']
+
+                    total_audio += audio_duration
+                    manifest.mark_done(input_path, output_paths[input_path], signature)
+                    self.transcription_done.emit(input_path, transcription_time, audio_duration)
+                    if result_cache is not None:
+                        for duplicate_path, duplicate_output in result_cache.store(input_path, output_paths[input_path]):
+                            file_from_cache(duplicate_path, duplicate_output)
+        finally:
+            planner.shutdown()
+            release_shared_model()
+            progress_queue.put(None)
+            forwarder.join()
+
+        self.memory_report.emit(sharing_mode, list(memory_by_pid.values()))
+        if result_cache is not None:
+            self.cache_report.emit(result_cache.stats())
+
+        # Horas de audio procesadas por hora de reloj con esta cantidad de procesos
+        wall_time = time.time() - start_time
+        throughput = total_audio / wall_time if wall_time > 0 else 0
+        self.throughput_report.emit(self.workers, throughput)
+        self.all_transcriptions_done.emit()
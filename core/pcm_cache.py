@@ -0,0 +1,120 @@
+import os
+import shutil
+import subprocess
+import threading
+import config
+from core.audio_catalog import AudioCatalog
+
+SAMPLE_RATE = 16000
+READ_CHUNK_SIZE = 1024 * 1024
+
+def decode_to_raw_file(file_path, raw_path):
+    # Decodifica a 16 kHz mono float32 escribiendo en disco a medida que llega, sin cargar todo en memoria
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is not None:
+        command = [ffmpeg, '-nostdin', '-v', 'error', '-i', file_path,
+                   '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-']
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with open(raw_path, 'wb') as f:
+            for chunk in iter(lambda: process.stdout.read(READ_CHUNK_SIZE), b''):
+                f.write(chunk)
+        process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg no pudo decodificar {file_path}: {process.stderr.read().decode(errors='ignore')}")
+        return
+
+    # Sin ffmpeg en el PATH se usa el decodificador de faster-whisper (PyAV)
+    from faster_whisper import decode_audio
+    import numpy as np
+    audio = decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+    audio.astype(np.float32).tofile(raw_path)
+
+class PCMCache:
+    # Caché de audio decodificado, con clave por hash del contenido y desalojo LRU por tamaño
+    def __init__(self, cache_dir=config.PCM_CACHE_DIR, max_bytes=int(config.PCM_CACHE_MAX_GB * 1024 ** 3)):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_path(self, content_hash):
+        return os.path.join(self.cache_dir, f"{content_hash}.f32")
+
+    def peek(self, content_hash):
+        # Audio ya decodificado o None, sin decodificar nada si no está en la caché
+        import numpy as np
+
+        raw_path = self.get_path(content_hash)
+        try:
+            if os.path.getsize(raw_path) == 0:
+                return np.zeros(0, dtype=np.float32)
+            return np.memmap(raw_path, dtype=np.float32, mode='r')
+        except OSError:
+            return None
+
+    def load(self, file_path, content_hash=None):
+        import numpy as np
+
+        if content_hash is None:
+            catalog = AudioCatalog()
+            try:
+                content_hash = catalog.get_content_hash(file_path)
+            finally:
+                catalog.close()
+
+        raw_path = self.get_path(content_hash)
+        if os.path.exists(raw_path):
+            self.hits += 1
+            # Actualizar la fecha de uso para el desalojo LRU
+            os.utime(raw_path)
+        else:
+            self.misses += 1
+            temp_path = f"{raw_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                decode_to_raw_file(file_path, temp_path)
+                os.replace(temp_path, raw_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self.evict()
+
+        if os.path.getsize(raw_path) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(raw_path, dtype=np.float32, mode='r')
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.f32'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError as e:
+                    # En Windows no se puede borrar un archivo mapeado en memoria
+                    print(f"No se pudo desalojar {path}: {e}")
+
+_default_cache = None
+
+def get_pcm_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PCMCache()
+    return _default_cache
+
+def load_pcm(file_path, content_hash=None):
+    return get_pcm_cache().load(file_path, content_hash)
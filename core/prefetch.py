@@ -0,0 +1,83 @@
+import time
+import queue
+import threading
+
+_END = object()
+
+class PrefetchPipeline:
+    # Prepara los próximos archivos en un hilo productor mientras el consumidor transcribe.
+    # La cola acotada hace de contrapresión: el productor se detiene si va 'depth' archivos adelante.
+    def __init__(self, items, prepare, depth):
+        self.items = items
+        self.prepare = prepare
+        self.queue = queue.Queue(maxsize=max(1, depth))
+        self.stop_event = threading.Event()
+        self.producer = threading.Thread(target=self.produce, daemon=True)
+        self.producer_busy = 0.0
+        self.producer_blocked = 0.0
+        self.consumer_busy = 0.0
+        self.consumer_waiting = 0.0
+        self.start_time = None
+
+    def produce(self):
+        for item in self.items:
+            if self.stop_event.is_set():
+                break
+            start = time.perf_counter()
+            try:
+                result = (item, self.prepare(item), None)
+            except Exception as e:
+                result = (item, None, e)
+            prepared_at = time.perf_counter()
+            self.producer_busy += prepared_at - start
+            if not self.put(result):
+                return
+            self.producer_blocked += time.perf_counter() - prepared_at
+        self.put(_END)
+
+    def put(self, value):
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(value, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        self.start_time = time.perf_counter()
+        self.producer.start()
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                result = self.queue.get()
+                work_start = time.perf_counter()
+                self.consumer_waiting += work_start - wait_start
+                if result is _END:
+                    return
+                yield result
+                self.consumer_busy += time.perf_counter() - work_start
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stop_event.set()
+        # Vaciar la cola para destrabar al productor si estaba esperando lugar
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        wall = time.perf_counter() - self.start_time if self.start_time else 0
+        if wall <= 0:
+            return {}
+        return {
+            'wall_time': wall,
+            'prefetch_utilisation': self.producer_busy / wall,
+            'prefetch_blocked': self.producer_blocked / wall,
+            'transcribe_utilisation': self.consumer_busy / wall,
+            'transcribe_waiting': self.consumer_waiting / wall,
+            'bottleneck': "prefetch" if self.consumer_waiting > self.producer_blocked else "transcribe"
+        }
@@ -0,0 +1,110 @@
+import time
+import threading
+
+# Eventos de progreso comunes a los tres motores. Los hilos y procesos de transcripción publican
+# un evento por segmento; la interfaz lee solo el último de cada archivo con un temporizador.
+
+class ProgressEvent:
+    __slots__ = ('file', 'position', 'duration', 'segments', 'realtime_factor', 'finished', 'start')
+
+    def __init__(self, file, position, duration, segments, realtime_factor, finished=False, start=0.0):
+        self.file = file
+        self.position = position
+        self.duration = duration
+        self.segments = segments
+        self.realtime_factor = realtime_factor
+        self.finished = finished
+        # Posición desde la que se transcribió en esta ejecución (al retomar o si no se transcribió)
+        self.start = start
+
+    # Con __slots__ hace falta para poder enviarlo entre procesos
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+class ProgressTracker:
+    # Progreso de un archivo; 'publish' recibe cada ProgressEvent (el bus o una cola entre procesos)
+    def __init__(self, publish, file, duration, start_position=0.0):
+        self.publish = publish
+        self.file = file
+        self.duration = duration
+        self.start_position = start_position
+        self.position = start_position
+        self.segments = 0
+        self.start_time = time.perf_counter()
+
+    def realtime_factor(self):
+        elapsed = time.perf_counter() - self.start_time
+        return (self.position - self.start_position) / elapsed if elapsed > 0 else 0.0
+
+    def segment(self, end):
+        self.segments += 1
+        self.position = min(max(self.position, end), self.duration) if self.duration else end
+        self.publish(ProgressEvent(self.file, self.position, self.duration, self.segments, self.realtime_factor(),
+                                   start=self.start_position))
+
+    def resume_from(self, position):
+        self.start_position = self.position = position
+
+    def finish(self):
+        self.position = self.duration
+        self.publish(ProgressEvent(self.file, self.duration, self.duration, self.segments, self.realtime_factor(), True,
+                                   self.start_position))
+
+class ProgressBus:
+    # Guarda el último evento de cada archivo; la interfaz lo consulta con drain()
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_batch({})
+
+    def start_batch(self, durations):
+        # durations: {ruta: duración en segundos} de todos los archivos del lote
+        with self.lock:
+            self.durations = dict(durations)
+            self.latest = {}
+            self.changed = False
+            self.start_time = time.perf_counter()
+
+    def publish(self, event):
+        with self.lock:
+            self.latest[event.file] = event
+            self.changed = True
+
+    def mark_finished(self, file):
+        # Archivos que no se transcriben (ya hechos o copiados de la caché) cuentan como completos
+        duration = self.durations.get(file, 0.0)
+        self.publish(ProgressEvent(file, duration, duration, 0, 0.0, True, duration))
+
+    def tracker(self, file, duration=None):
+        if duration is None:
+            duration = self.durations.get(file, 0.0)
+        return ProgressTracker(self.publish, file, duration)
+
+    def drain(self):
+        # Devuelve un resumen del lote si hubo eventos nuevos desde la última llamada, o None
+        with self.lock:
+            if not self.changed:
+                return None
+            self.changed = False
+            events = list(self.latest.values())
+
+        total_seconds = sum(self.durations.values())
+        processed = sum(min(event.position, event.duration) for event in events)
+        # La velocidad solo cuenta el audio transcrito en esta ejecución: sin los archivos omitidos,
+        # copiados de la caché ni lo ya hecho antes de retomar
+        transcribed = sum(max(0.0, min(event.position, event.duration) - event.start) for event in events)
+        finished = sum(1 for event in events if event.finished)
+        active = [event for event in events if not event.finished]
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            'fraction': processed / total_seconds if total_seconds else 0.0,
+            'processed_seconds': processed,
+            'total_seconds': total_seconds,
+            'files_done': finished,
+            'total_files': len(self.durations),
+            'realtime_factor': transcribed / elapsed if elapsed > 0 else 0.0,
+            'active': active
+        }
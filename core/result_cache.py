@@ -0,0 +1,203 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import config
+from core.audio_catalog import AudioCatalog
+from core.checkpoint import output_options
+from core.adaptive_beam import BEAM_SIZE, PATIENCE, WINDOW_SECONDS
+
+# Caché de transcripciones con clave (hash del contenido del audio, opciones efectivas).
+# Las copias idénticas de una grabación en distintas carpetas se transcriben una sola vez.
+
+def faster_whisper_decoding(job):
+    # Misma elección de modo que transcribe_with_faster_whisper y transcribe_segments
+    if job.get('batched_decoding'):
+        return {'mode': "batched", 'beam_size': 5}
+    if job.get('adaptive_beam'):
+        # Voraz a temperatura 0 y haz solo en las ventanas que no pasan los umbrales
+        return {'mode': "adaptive", 'temperature': 0.0, 'escalation_beam_size': BEAM_SIZE,
+                'escalation_patience': PATIENCE, 'window_seconds': WINDOW_SECONDS}
+    return {'mode': "beam", 'beam_size': 5, 'patience': 1.2}
+
+def effective_options(engine, job):
+    # Todo lo que cambia el texto resultante: motor, modelo, tarea, idioma, temperatura y beam
+    options = dict(output_options(job, engine), engine=engine)
+    if engine == "faster-whisper":
+        options.update(model=config.FASTER_WHISPER_MODEL, decoding=faster_whisper_decoding(job))
+    elif engine == "original-whisper":
+        options.update(model=config.MODEL_ID, num_beams=1)
+    return options
+
+def result_key(content_hash, options):
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(content_hash.encode())
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+def copy_atomic(source, destination):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, destination)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class ResultCache:
+    def __init__(self, cache_dir=config.RESULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def contains(self, key):
+        return os.path.exists(self.get_path(key))
+
+    def store(self, key, output_path):
+        copy_atomic(output_path, self.get_path(key))
+
+    def materialise(self, key, output_path, shift_seconds=0.0):
+        if not shift_seconds:
+            copy_atomic(self.get_path(key), output_path)
+            return
+        # Casi duplicado con otro recorte inicial: se corrigen los tiempos al copiar
+        from core.fingerprint import shift_transcript_text
+        with open(self.get_path(key), 'r', encoding='utf-8') as f:
+            text = shift_transcript_text(f.read(), shift_seconds)
+        temp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, output_path)
+
+class ResultCacheSession:
+    # Reparte un lote entre aciertos (se copian de inmediato), archivos a transcribir y copias
+    # repetidas dentro del mismo lote (se copian cuando termina la primera). Con las huellas
+    # activadas, las grabaciones casi idénticas se tratan igual o solo se marcan.
+    def __init__(self, engine, job, get_output_path, cache=None):
+        self.cache = cache or ResultCache()
+        self.options = effective_options(engine, job)
+        self.get_output_path = get_output_path
+        self.keys = {}
+        self.waiting = {}
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0
+        self.near_duplicates = 0
+        self.flagged = []
+        self.fingerprint_costs = []
+
+    def partition(self, files):
+        # files: lista de (ruta, carpeta relativa). Devuelve (a transcribir, [(ruta, salida)] copiados)
+        catalog = AudioCatalog()
+        try:
+            to_transcribe = []
+            materialised = []
+            first_by_hash = {}
+            for input_path, relative_path in files:
+                output_path = self.get_output_path(input_path, relative_path)
+                try:
+                    content_hash = catalog.get_content_hash(input_path)
+                except OSError as e:
+                    print(f"No se pudo calcular el hash de {input_path}: {e}")
+                    to_transcribe.append((input_path, relative_path))
+                    continue
+                key = self.keys[input_path] = result_key(content_hash, self.options)
+
+                if self.cache.contains(key):
+                    self.cache.materialise(key, output_path)
+                    self.hits += 1
+                    materialised.append((input_path, output_path))
+                    continue
+                if content_hash in first_by_hash:
+                    self.waiting.setdefault(key, []).append((input_path, relative_path, output_path, 0.0))
+                    self.duplicates += 1
+                    continue
+
+                match = self.find_near_duplicate(catalog, input_path, first_by_hash)
+                if match is not None and config.NEAR_DUPLICATE_ACTION == "reuse":
+                    match_hash, similarity, shift_seconds = match
+                    match_key = result_key(match_hash, self.options)
+                    self.near_duplicates += 1
+                    print(f"{input_path}: casi idéntico ({similarity:.0%}) a otra grabación, se reutiliza su transcripción")
+                    if self.cache.contains(match_key):
+                        self.cache.materialise(match_key, output_path, shift_seconds)
+                        materialised.append((input_path, output_path))
+                    else:
+                        self.waiting.setdefault(match_key, []).append((input_path, relative_path, output_path, shift_seconds))
+                    continue
+                if match is not None:
+                    self.flagged.append((input_path, match[1]))
+
+                first_by_hash[content_hash] = input_path
+                self.misses += 1
+                to_transcribe.append((input_path, relative_path))
+            return to_transcribe, materialised
+        finally:
+            catalog.close()
+
+    def find_near_duplicate(self, catalog, input_path, first_by_hash):
+        if not config.FINGERPRINT_ENABLED:
+            return None
+        from core.fingerprint import ensure_fingerprint, find_near_duplicate
+
+        try:
+            content_hash, fingerprint, duration, cost = ensure_fingerprint(catalog, input_path)
+        except (OSError, RuntimeError) as e:
+            print(f"No se pudo calcular la huella de {input_path}: {e}")
+            return None
+        if cost:
+            self.fingerprint_costs.append((input_path, cost))
+
+        # Candidatos: audios con transcripción en la caché o que se transcriben en este lote
+        accept = lambda candidate: candidate in first_by_hash or self.cache.contains(result_key(candidate, self.options))
+        return find_near_duplicate(catalog, content_hash, fingerprint, duration, accept)
+
+    def store(self, input_path, output_path):
+        # Guarda el resultado recién transcrito y copia las repeticiones que lo esperaban
+        key = self.keys.get(input_path)
+        if key is None or not os.path.exists(output_path):
+            return []
+        self.cache.store(key, output_path)
+        materialised = []
+        for duplicate_path, _, duplicate_output, shift_seconds in self.waiting.pop(key, []):
+            self.cache.materialise(key, duplicate_output, shift_seconds)
+            materialised.append((duplicate_path, duplicate_output))
+        return materialised
+
+    def release_failed(self, input_path):
+        # La transcripción de input_path falló, así que store() nunca va a liberar a las copias que
+        # la esperaban. Devuelve [(ruta, carpeta relativa)] a transcribir: una sola de las copias
+        # idénticas (las demás pasan a esperar a esa) y cada casi duplicado, que tiene su propio audio.
+        key = self.keys.get(input_path)
+        waiting = self.waiting.pop(key, []) if key is not None else []
+        exact = [item for item in waiting if self.keys.get(item[0]) == key]
+        near = [item for item in waiting if self.keys.get(item[0]) != key]
+        retry = [(path, relative_path) for path, relative_path, _, _ in near]
+        self.near_duplicates -= len(near)
+        self.misses += len(near)
+        if exact:
+            first, rest = exact[0], exact[1:]
+            if rest:
+                self.waiting[key] = rest
+            retry.append((first[0], first[1]))
+            self.duplicates -= 1
+            self.misses += 1
+        return retry
+
+    def stats(self):
+        reused = self.hits + self.duplicates + self.near_duplicates
+        total = reused + self.misses
+        return {
+            'hits': self.hits,
+            'duplicates': self.duplicates,
+            'near_duplicates': self.near_duplicates,
+            'misses': self.misses,
+            'hit_rate': reused / total if total else 0.0,
+            'flagged': self.flagged,
+            'fingerprint_costs': self.fingerprint_costs
+        }
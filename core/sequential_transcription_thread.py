@@ -1,50 +1,134 @@
 import os
+import time
 import subprocess
 import re
 from PyQt6.QtCore import QThread, pyqtSignal
+from utils.audio_utils import get_output_dir
+from core.checkpoint import JobManifest, job_signature
+from core.result_cache import ResultCacheSession
+from core.progress import ProgressBus
+from core.language_id import plan_language_groups
+import config
+
+# Tiempos de cada segmento en la salida del ejecutable: [mm:ss.mmm --> mm:ss.mmm] o con horas
+_SEGMENT_PATTERN = re.compile(r'\[(?:\d+:)?\d{2}:\d{2}\.\d{3} --> (?:(\d+):)?(\d{2}):(\d{2}\.\d{3})\]')
+
+def parse_segment_end(line):
+    match = _SEGMENT_PATTERN.search(line)
+    if match is None:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
 
 class SequentialTranscriptionThread(QThread):
     transcription_started = pyqtSignal(str)
     transcription_finished = pyqtSignal(str, bool)
     output_received = pyqtSignal(str)
-    progress_update = pyqtSignal(str, str, str)
+    transcription_done = pyqtSignal(str, float, float)
+    cached_result = pyqtSignal(str)
+    cache_report = pyqtSignal(dict)
+    language_report = pyqtSignal(dict)
 
-    def __init__(self, files_to_transcribe, executable_path, base_output_dir, folder_input, current_language, translate):
+    def __init__(self, files_to_transcribe, executable_path, base_output_dir, current_language, translate, progress_bus=None):
         super().__init__()
+        # Lista de (ruta del archivo, carpeta relativa)
         self.files_to_transcribe = files_to_transcribe
         self.executable_path = executable_path
         self.base_output_dir = base_output_dir
-        self.folder_input = folder_input
         self.current_language = current_language
         self.translate = translate
+        self.progress_bus = progress_bus or ProgressBus()
+
+    def get_output_path(self, input_path, relative_path):
+        # El ejecutable escribe <nombre>.txt en la carpeta de salida
+        output_subfolder = get_output_dir(self.base_output_dir, relative_path)
+        return os.path.join(output_subfolder, f"{os.path.splitext(os.path.basename(input_path))[0]}.txt")
+
+    def get_job(self):
+        # Opciones fijas que se le pasan al ejecutable; forman parte de la firma y de la clave de la caché
+        return {
+            'language': self.current_language,
+            'task': "translate" if self.translate else "transcribe",
+            'model': "large-v2",
+            'temperature': 0.00001,
+            'compression_ratio_threshold': 2,
+            'sentence': True
+        }
 
     def run(self):
-        for audio_file in self.files_to_transcribe:
+        # El ejecutable no permite retomar a mitad de archivo: solo se omiten los ya terminados
+        job = self.get_job()
+        signature = job_signature("faster-whisper-xxl", job)
+        manifest = JobManifest(self.base_output_dir)
+        files, skipped = manifest.pending(self.files_to_transcribe, self.get_output_path, signature)
+        if skipped:
+            self.output_received.emit(f"{skipped} archivos ya estaban transcritos, se omiten")
+            pending_paths = {input_path for input_path, _ in files}
+            for input_path, _ in self.files_to_transcribe:
+                if input_path not in pending_paths:
+                    self.progress_bus.mark_finished(input_path)
+
+        result_cache = None
+        if config.RESULT_CACHE_ENABLED:
+            result_cache = ResultCacheSession("faster-whisper-xxl", job, self.get_output_path)
+            files, materialised = result_cache.partition(files)
+            for input_path, output_path in materialised:
+                manifest.mark_done(input_path, output_path, signature)
+                self.progress_bus.mark_finished(input_path)
+                self.cached_result.emit(input_path)
+
+        # Con "Auto" se identifica el idioma antes y se pasa -l por archivo, en grupos del mismo
+        # idioma. El ejecutable decodifica por su cuenta, así que la muestra se lee con ffmpeg.
+        groups = [(self.current_language, files)]
+        if not self.current_language and files:
+            groups, report = plan_language_groups(files, use_pcm_cache=False)
+            if report is not None:
+                self.language_report.emit(report)
+        # Es una lista: lo que se agrega mientras se recorre también se transcribe
+        queue = [(input_path, relative_path, language) for language, group in groups for input_path, relative_path in group]
+
+        for input_path, relative_path, language in queue:
+            audio_file = input_path
             self.transcription_started.emit(audio_file)
-            if ' > ' in audio_file:
-                subfolder, filename = audio_file.split(' > ')
-                input_path = os.path.join(self.folder_input, subfolder, filename)
-                output_subfolder = os.path.join(self.base_output_dir, subfolder)
-            else:
-                input_path = os.path.join(self.folder_input, audio_file)
-                output_subfolder = self.base_output_dir
+            output_subfolder = get_output_dir(self.base_output_dir, relative_path)
 
             os.makedirs(output_subfolder, exist_ok=True)
             
-            language_option = f"-l {self.current_language}" if self.current_language else ""
+            language_option = f"-l {language}" if language else ""
             task_option = "translate" if self.translate else "transcribe"
             
             command = f'"{self.executable_path}" "{input_path}" {language_option} -m large-v2 --temperature 0.00001 --compression_ratio_threshold 2 --task {task_option} --sentence --output_dir "{output_subfolder}" --output_format txt'
             
+            start_time = time.time()
             process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1, universal_newlines=True)
             
+            # El ejecutable es el único motor externo: su salida se traduce aquí a eventos del bus
+            tracker = self.progress_bus.tracker(input_path)
             for line in iter(process.stdout.readline, ''):
                 self.output_received.emit(line.strip())
-                match = re.search(r'\[(\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}\.\d{3})\]', line)
-                if match:
-                    start, end = match.groups()
-                    self.progress_update.emit(start, end, audio_file)
+                end = parse_segment_end(line)
+                if end is not None:
+                    tracker.segment(end)
             
             process.wait()
             success = process.returncode == 0
-            self.transcription_finished.emit(audio_file, success)
\ No newline at end of file
+            # También si falló: el archivo ya no queda pendiente en la barra del lote
+            tracker.finish()
+            if success:
+                self.transcription_done.emit(input_path, time.time() - start_time, tracker.duration)
+                output_path = self.get_output_path(input_path, relative_path)
+                manifest.mark_done(input_path, output_path, signature)
+                if result_cache is not None:
+                    for duplicate_path, duplicate_output in result_cache.store(input_path, output_path):
+                        manifest.mark_done(duplicate_path, duplicate_output, signature)
+                        self.progress_bus.mark_finished(duplicate_path)
+                        self.cached_result.emit(duplicate_path)
+            elif result_cache is not None:
+                # Las copias que esperaban este resultado se transcriben al final de la cola
+                for retry_path, retry_relative in result_cache.release_failed(input_path):
+                    self.output_received.emit(f"Se transcribe {retry_path}, que esperaba el resultado de {input_path}")
+                    queue.append((retry_path, retry_relative, language))
+            self.transcription_finished.emit(audio_file, success)
+
+        if result_cache is not None:
+            self.cache_report.emit(result_cache.stats())
\ No newline at end of file
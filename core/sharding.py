@@ -0,0 +1,73 @@
+import re
+import math
+from collections import namedtuple
+
+# División de un archivo largo en partes que se transcriben en paralelo, cortando en silencios
+Segment = namedtuple('Segment', ['start', 'end', 'text'])
+
+# Cantidad máxima de palabras repetidas que se buscan en el borde entre dos partes
+EDGE_OVERLAP_MAX_WORDS = 12
+
+def count_shards(duration, workers, min_shard_seconds):
+    if workers <= 1:
+        return 1
+    return max(1, min(workers, math.floor(duration / min_shard_seconds)))
+
+def plan_shards(speech_chunks, total_samples, num_shards):
+    # Devuelve rangos (inicio, fin) en muestras que cubren todo el archivo. Cada corte se hace
+    # en el centro del silencio más cercano al punto que dividiría el archivo en partes iguales.
+    if num_shards <= 1 or len(speech_chunks) < 2:
+        return [(0, total_samples)]
+
+    gaps = [(previous['end'] + following['start']) // 2
+            for previous, following in zip(speech_chunks, speech_chunks[1:])]
+
+    cuts = []
+    for k in range(1, num_shards):
+        target = total_samples * k // num_shards
+        candidates = [gap for gap in gaps if not cuts or gap > cuts[-1]]
+        if not candidates:
+            break
+        cuts.append(min(candidates, key=lambda gap: abs(gap - target)))
+
+    bounds = [0] + cuts + [total_samples]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s]", "", text.lower()).split()
+
+def trim_edge_overlap(previous, following):
+    # Whisper suele repetir al inicio de una parte las últimas palabras de la anterior;
+    # se quita del segmento siguiente el prefijo que coincide con el final del anterior.
+    previous_words = normalize_words(previous.text)
+    following_words = following.text.split()
+    normalized_following = normalize_words(following.text)
+    if len(normalized_following) != len(following_words):
+        # La puntuación suelta cambia la cuenta de palabras; no se puede alinear con seguridad
+        return following if normalized_following != previous_words else None
+
+    limit = min(EDGE_OVERLAP_MAX_WORDS, len(previous_words), len(normalized_following))
+    for size in range(limit, 0, -1):
+        if previous_words[-size:] == normalized_following[:size]:
+            # Una sola palabra coincidente solo cuenta si es todo el segmento siguiente
+            if size == 1 and len(normalized_following) > 1:
+                break
+            remaining = following_words[size:]
+            if not remaining:
+                return None
+            return Segment(following.start, following.end, " " + " ".join(remaining))
+    return following
+
+def merge_shard_segments(shard_segments):
+    # shard_segments: lista por parte, en orden, de segmentos ya desplazados al tiempo del archivo
+    merged = []
+    duplicates = 0
+    for segments in shard_segments:
+        segments = list(segments)
+        if merged and segments:
+            first = trim_edge_overlap(merged[-1], segments[0])
+            if first is not segments[0]:
+                duplicates += 1
+            segments = ([first] if first is not None else []) + segments[1:]
+        merged.extend(segments)
+    return merged, duplicates
@@ -0,0 +1,36 @@
+import bisect
+
+SAMPLE_RATE = 16000
+
+def get_speech_chunks(audio, min_silence_duration_ms=500):
+    # Mismo VAD (Silero) que usa faster-whisper con vad_filter=True; devuelve muestras {'start', 'end'}
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    return get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=min_silence_duration_ms))
+
+def collect_speech(audio, chunks):
+    import numpy as np
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate([audio[chunk['start']:chunk['end']] for chunk in chunks])
+
+class SpeechTimeMap:
+    # Convierte tiempos del audio con solo voz a tiempos del archivo original
+    def __init__(self, chunks, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.chunk_starts = [chunk['start'] for chunk in chunks]
+        self.speech_ends = []
+        total = 0
+        for chunk in chunks:
+            total += chunk['end'] - chunk['start']
+            self.speech_ends.append(total)
+
+    def get_original_time(self, seconds, is_end=False):
+        # Un final que cae justo en el borde de una región pertenece a esa región y no al
+        # comienzo de la siguiente (como is_end en faster-whisper)
+        if not self.speech_ends:
+            return seconds
+        sample = int(seconds * self.sample_rate)
+        find = bisect.bisect_left if is_end else bisect.bisect_right
+        index = min(find(self.speech_ends, sample), len(self.speech_ends) - 1)
+        speech_start = self.speech_ends[index - 1] if index > 0 else 0
+        return (self.chunk_starts[index] + sample - speech_start) / self.sample_rate
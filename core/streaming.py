@@ -0,0 +1,122 @@
+import shutil
+import tempfile
+import subprocess
+import config
+from core.pcm_cache import load_pcm, SAMPLE_RATE
+from core.sharding import Segment
+from utils.audio_utils import format_duration
+
+# Transcripción por ventanas de tamaño fijo: la memoria no depende de la duración del archivo
+
+# Audio que se deja sin confirmar al final de cada ventana; se vuelve a transcribir
+# junto con la siguiente para no cortar una frase por la mitad
+CARRY_MARGIN_SECONDS = 5
+
+def is_streaming_duration(duration):
+    return config.STREAMING_ENABLED and duration >= config.STREAMING_MIN_SECONDS
+
+def iter_pcm_windows(input_path, window_samples, start_sample=0, end_sample=None):
+    # Devuelve ventanas float32 a 16 kHz entre start_sample y end_sample (None: hasta el final),
+    # leídas del memmap de la caché o de ffmpeg por tubería
+    import numpy as np
+
+    if config.PCM_CACHE_ENABLED:
+        audio = load_pcm(input_path)
+        end_sample = len(audio) if end_sample is None else min(end_sample, len(audio))
+        for start in range(start_sample, end_sample, window_samples):
+            yield np.array(audio[start:min(start + window_samples, end_sample)])
+        return
+
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("La transcripción por ventanas necesita ffmpeg en el PATH o la caché PCM activada")
+
+    command = [ffmpeg, '-nostdin', '-v', 'error', '-ss', str(start_sample / SAMPLE_RATE), '-i', input_path]
+    if end_sample is not None:
+        command += ['-t', str((end_sample - start_sample) / SAMPLE_RATE)]
+    command += ['-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-']
+    # Los errores van a un archivo temporal: una tubería llena bloquearía a ffmpeg mientras se lee stdout
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+        window_bytes = window_samples * 4
+        try:
+            while True:
+                data = process.stdout.read(window_bytes)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)
+            process.wait()
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        # Un archivo que no se pudo decodificar no debe quedar como transcripción completa y vacía
+        if process.returncode != 0:
+            errors.seek(0)
+            message = errors.read().decode('utf-8', 'replace').strip()
+            raise RuntimeError(f"ffmpeg no pudo decodificar {input_path} (código {process.returncode}): {message[-500:]}")
+
+def split_committed(segments, audio_seconds, is_last):
+    # Devuelve (segmentos confirmados, segundo desde el que se arrastra audio a la próxima ventana)
+    if is_last:
+        return segments, audio_seconds
+    limit = audio_seconds - CARRY_MARGIN_SECONDS
+    committed = [segment for segment in segments if segment.end <= limit]
+    if committed:
+        return committed, committed[-1].end
+    if segments:
+        # Un segmento largo cruza el margen: se arrastra desde su inicio
+        return [], segments[0].start
+    return [], max(0, limit)
+
+def stream_segments(model, model_type, input_path, job, start_sample=0, end_sample=None, stats=None):
+    # Genera los segmentos confirmados entre start_sample y end_sample, con tiempos del archivo.
+    # Solo hay en memoria una ventana y el audio arrastrado, sea el archivo entero o una parte.
+    import numpy as np
+    from core.transcription_engine import transcribe_segments
+    from core.adaptive_beam import new_stats
+
+    # El mismo stats en todas las ventanas mantiene el idioma detectado en la primera
+    if stats is None and job.get('adaptive_beam'):
+        stats = new_stats()
+    window_samples = int(config.STREAMING_WINDOW_SECONDS * SAMPLE_RATE)
+    windows = iter_pcm_windows(input_path, window_samples, start_sample, end_sample)
+    carry = np.zeros(0, dtype=np.float32)
+    carry_offset = start_sample / SAMPLE_RATE
+    previous_text = None
+
+    window = next(windows, None)
+    while window is not None:
+        following = next(windows, None)
+        is_last = following is None
+
+        audio = np.concatenate([carry, window]) if len(carry) else window
+        segments = transcribe_segments(model, model_type, audio, job, prompt=previous_text, stats=stats)
+        committed, carry_from = split_committed(segments, len(audio) / SAMPLE_RATE, is_last)
+
+        # Si el arrastre ocuparía toda la ventana no se avanzaría nunca: se confirma todo
+        carry_sample = int(carry_from * SAMPLE_RATE)
+        if not is_last and len(audio) - carry_sample >= window_samples:
+            committed, carry_sample = segments, len(audio)
+
+        for start, end, text in committed:
+            yield Segment(start + carry_offset, end + carry_offset, text)
+        if committed:
+            previous_text = committed[-1].text
+
+        carry = np.array(audio[carry_sample:])
+        carry_offset += carry_sample / SAMPLE_RATE
+        window = following
+
+def transcribe_streaming(model, model_type, input_path, writer, job, stats=None):
+    # Escribe cada segmento apenas se confirma.
+    # Si el writer trae un punto de control, la lectura empieza desde ahí.
+    print(f"Transcribiendo por ventanas de {config.STREAMING_WINDOW_SECONDS} s")
+
+    start_sample = int(writer.resume_time * SAMPLE_RATE)
+    if start_sample:
+        print(f"Retomando desde {format_duration(writer.resume_time)}")
+    for start, end, text in stream_segments(model, model_type, input_path, job, start_sample, stats=stats):
+        writer.write(f"[{format_duration(start)} -> {format_duration(end)}] {text}\n", end)
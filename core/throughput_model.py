@@ -0,0 +1,150 @@
+import os
+import json
+import math
+import threading
+import config
+
+# Modelo del tiempo de transcripción: tiempo = preparación fija por archivo + ritmo * segundos de audio.
+# Se ajusta por mínimos cuadrados con sumas acumuladas, así que cada archivo terminado cuesta O(1)
+# y la estimación no recorre el historial. Hay un ajuste por (motor, cómputo, tarea, idioma) y
+# otros más generales para cuando todavía no hay datos suficientes de esa combinación.
+
+WILDCARD = "*"
+MIN_SAMPLES = 3
+# Valor z del intervalo de confianza del 95 %
+CONFIDENCE_Z = 1.96
+
+def t_critical(degrees_of_freedom):
+    # Aproximación de Cornish-Fisher a la t de Student: ensancha el intervalo con pocos datos
+    z = CONFIDENCE_Z
+    return z + (z ** 3 + z) / (4 * degrees_of_freedom)
+
+class LinearFit:
+    __slots__ = ('n', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy', 'sum_yy')
+
+    def __init__(self, sums=None):
+        self.n, self.sum_x, self.sum_y, self.sum_xx, self.sum_xy, self.sum_yy = sums or (0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def to_list(self):
+        return [self.n, self.sum_x, self.sum_y, self.sum_xx, self.sum_xy, self.sum_yy]
+
+    def add(self, x, y):
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+        self.sum_yy += y * y
+
+    def determinant(self):
+        return self.n * self.sum_xx - self.sum_x ** 2
+
+    def coefficients(self):
+        # Devuelve (preparación por archivo, segundos de trabajo por segundo de audio, con ordenada)
+        det = self.determinant()
+        if self.n >= 3 and det > 1e-9 * self.n * self.sum_xx:
+            rate = (self.n * self.sum_xy - self.sum_x * self.sum_y) / det
+            overhead = (self.sum_y - rate * self.sum_x) / self.n
+            if overhead >= 0 and rate > 0:
+                return overhead, rate, True
+        # Pocos datos, todos de la misma duración o preparación negativa: recta por el origen
+        rate = self.sum_xy / self.sum_xx if self.sum_xx > 0 else 0.0
+        return 0.0, rate, False
+
+    def predict(self, files, seconds):
+        # Devuelve (segundos estimados, margen del intervalo de confianza o None)
+        overhead, rate, with_overhead = self.coefficients()
+        estimate = files * overhead + seconds * rate
+
+        parameters = 2 if with_overhead else 1
+        degrees_of_freedom = self.n - parameters
+        if degrees_of_freedom <= 0:
+            return estimate, None
+        squared_error = (self.sum_yy - 2 * overhead * self.sum_y - 2 * rate * self.sum_xy + self.n * overhead ** 2
+                         + 2 * overhead * rate * self.sum_x + rate ** 2 * self.sum_xx)
+        residual_variance = max(0.0, squared_error) / degrees_of_freedom
+
+        # Incertidumbre de los coeficientes más la variación propia de cada archivo nuevo
+        if with_overhead:
+            leverage = (files ** 2 * self.sum_xx - 2 * files * seconds * self.sum_x + seconds ** 2 * self.n) / self.determinant()
+        else:
+            leverage = seconds ** 2 / self.sum_xx
+        margin = t_critical(degrees_of_freedom) * math.sqrt(residual_variance * (max(0.0, leverage) + files))
+        return estimate, margin
+
+class ThroughputModel:
+    def __init__(self, path=config.THROUGHPUT_MODEL_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fits = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.fits = {tuple(key.split("|")): LinearFit(sums) for key, sums in data.items()}
+
+    def save(self):
+        data = {"|".join(key): fit.to_list() for key, fit in self.fits.items()}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def is_empty(self):
+        return not self.fits
+
+    def seed(self, records):
+        # Historial anterior: cada registro alimenta los ajustes de su clave; los que no tienen
+        # motor ni idioma (migrados del JSON) solo el general
+        with self.lock:
+            for record in records:
+                if not record['duration']:
+                    continue
+                if record['engine'] is None:
+                    level_keys = [(WILDCARD,) * 4]
+                else:
+                    level_keys = self.levels((record['engine'], record['compute'], record['task'], record['language']))
+                for level_key in level_keys:
+                    self.fits.setdefault(level_key, LinearFit()).add(record['duration'], record['transcription_time'])
+            self.save()
+
+    def levels(self, key):
+        engine, compute, task, language = key
+        return [
+            key,
+            (engine, WILDCARD, task, language),
+            (engine, WILDCARD, WILDCARD, WILDCARD),
+            (WILDCARD,) * 4
+        ]
+
+    def add(self, key, audio_duration, transcription_time):
+        # key: (motor, cómputo, tarea, idioma); se actualizan los cuatro niveles
+        if audio_duration <= 0:
+            return
+        with self.lock:
+            for level_key in self.levels(key):
+                self.fits.setdefault(level_key, LinearFit()).add(audio_duration, transcription_time)
+            self.save()
+
+    def predict(self, key, files, seconds):
+        # Usa el ajuste más específico con datos suficientes. Devuelve None si no hay ninguno.
+        with self.lock:
+            for level, level_key in enumerate(self.levels(key)):
+                fit = self.fits.get(level_key)
+                if fit is None or fit.n < MIN_SAMPLES:
+                    continue
+                estimate, margin = fit.predict(files, seconds)
+                overhead, rate, _ = fit.coefficients()
+                return {
+                    'seconds': estimate,
+                    'margin': margin,
+                    'level': level,
+                    'samples': fit.n,
+                    'overhead': overhead,
+                    'rate': rate
+                }
+        return None
@@ -1,105 +1,142 @@
-import os
-import time
-import torch
-from faster_whisper import WhisperModel
 from PyQt6.QtCore import QThread, pyqtSignal
-from utils.audio_utils import get_audio_duration, format_duration
+from core.transcription_engine import get_output_path, build_job_options, transcribe_file, prepare_audio, format_timestamp, transcribe_files_batched_with_pipeline
+from core.prefetch import PrefetchPipeline
+from core.checkpoint import JobManifest, job_signature
+from core.result_cache import ResultCacheSession
+from core.streaming import is_streaming_duration
+from core.progress import ProgressBus
+from core.language_id import plan_language_groups
+from core.assisted_decoding import enable_assisted_decoding
+from core.adaptive_beam import new_stats
+from utils.audio_utils import get_audio_duration
+import config
 
 class TranscriptionThread(QThread):
     transcription_done = pyqtSignal(str, float, float)
     all_transcriptions_done = pyqtSignal()
-    progress_update = pyqtSignal(int, int)
+    batch_report = pyqtSignal(dict)
+    pipeline_report = pyqtSignal(dict)
+    cached_result = pyqtSignal(str)
+    cache_report = pyqtSignal(dict)
+    language_report = pyqtSignal(dict)
+    decoding_report = pyqtSignal(str, dict)
+    escalation_report = pyqtSignal(str, dict)
 
-    def __init__(self, pipe, files, directory, language, translate, transcription_options, auto_detect, base_output_dir, model_type):
+    def __init__(self, pipe, files, language, translate, transcription_options, auto_detect, base_output_dir, model_type, progress_bus=None):
         super().__init__()
         self.pipe = pipe
+        # Lista de (ruta del archivo, carpeta relativa)
         self.files = files
-        self.directory = directory
         self.language = language
         self.translate = translate
         self.transcription_options = transcription_options
         self.auto_detect = auto_detect
         self.base_output_dir = base_output_dir
         self.model_type = model_type
+        # El progreso por segmento se publica en el bus; la interfaz lo lee con su temporizador
+        self.progress_bus = progress_bus or ProgressBus()
 
     def run(self):
-        total_files = len(self.files)
-        for index, audio_file in enumerate(self.files, 1):
-            if ' > ' in audio_file:
-                subfolder, filename = audio_file.split(' > ')
-                input_path = os.path.join(self.directory, subfolder, filename)
-                output_path = os.path.join(self.base_output_dir, subfolder, f"{os.path.splitext(filename)[0]}.txt")
-            else:
-                input_path = os.path.join(self.directory, audio_file)
-                output_path = os.path.join(self.base_output_dir, f"{os.path.splitext(audio_file)[0]}.txt")
-            
-            self.transcribe_audio(input_path, output_path)
-            self.progress_update.emit(index, total_files)
-        
+        # Los archivos ya terminados con las mismas opciones en una ejecución anterior se omiten
+        job = build_job_options(self.language, self.translate, self.auto_detect, self.transcription_options)
+        get_output = lambda input_path, relative_path: get_output_path(self.base_output_dir, relative_path, input_path)
+        self.signature = job_signature(self.model_type, job)
+        self.manifest = JobManifest(self.base_output_dir)
+        files, skipped = self.manifest.pending(self.files, get_output, self.signature)
+        if skipped:
+            print(f"{skipped} archivos ya estaban transcritos, se omiten")
+            pending_paths = {input_path for input_path, _ in files}
+            for input_path, _ in self.files:
+                if input_path not in pending_paths:
+                    self.progress_bus.mark_finished(input_path)
+
+        # Las copias idénticas de audios ya transcritos se copian desde la caché sin transcribir
+        self.result_cache = None
+        if config.RESULT_CACHE_ENABLED:
+            self.result_cache = ResultCacheSession(self.model_type, job, get_output)
+            files, materialised = self.result_cache.partition(files)
+            for input_path, output_path in materialised:
+                self.file_from_cache(input_path, output_path)
+
+        # Con "Auto", cada grupo de un mismo idioma se transcribe con el idioma forzado. La firma y la
+        # caché siguen usando el trabajo original: el resultado es el que se pidió con "Auto".
+        groups = [(None, files)]
+        if self.auto_detect and files:
+            groups, report = plan_language_groups(files)
+            if report is not None:
+                self.language_report.emit(report)
+        for language, group in groups:
+            self.transcribe_group(group, job if language is None else dict(job, language=language))
+
+        if self.result_cache is not None:
+            self.cache_report.emit(self.result_cache.stats())
         self.all_transcriptions_done.emit()
 
-    def transcribe_audio(self, input_path, output_path):
-        start_time = time.time()
-        
-        corrected_input_path = os.path.normpath(input_path)
-        
-        if not os.path.exists(corrected_input_path):
-            raise FileNotFoundError(f"No se pudo encontrar el archivo: {corrected_input_path}")
-        
-        audio_duration = get_audio_duration(corrected_input_path)
-        
-        # Configurar parámetros de transcripción
-        task = "translate" if self.translate else "transcribe"
-        language = self.language if not self.auto_detect else None
-        
-        if isinstance(self.pipe, WhisperModel):
-            print("Transcribiendo con Faster-Whisper")
-            segments, info = self.pipe.transcribe(
-                corrected_input_path,
-                task=task,
-                language=language,
-                temperature=self.transcription_options.get('temperature', 0.0),
-                beam_size=5,
-                patience=1.2,
-                vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=500)
-            )
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("Transcripción con timestamps:\n")
-                for segment in segments:
-                    f.write(f"[{self.format_timestamp(segment.start)} -> {self.format_timestamp(segment.end)}] {segment.text}\n")
-        else:
-            print("Transcribiendo con Whisper Original")
-            generate_kwargs = {
-                "task": task,
-                "language": language,
-                "max_new_tokens": 256,
-                "temperature": self.transcription_options.get('temperature', 0.0),
-                "do_sample": False,
-                "num_beams": 1
-            }
-
-            result = self.pipe(corrected_input_path, return_timestamps=True, generate_kwargs=generate_kwargs)
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("Transcripción con timestamps:\n")
-                if "chunks" in result:
-                    for chunk in result["chunks"]:
-                        start = chunk.get('timestamp', [0, 0])[0]
-                        end = chunk.get('timestamp', [0, 0])[1]
-                        chunk_text = chunk.get('text', '')
-                        f.write(f"[{self.format_timestamp(start)} -> {self.format_timestamp(end)}] {chunk_text}\n")
-                else:
-                    import json
-                    f.write(json.dumps(result, indent=2))
-        
-        end_time = time.time()
-        transcription_time = end_time - start_time
+    def transcribe_group(self, files, job):
+        # La decodificación asistida va de a una ventana, así que no hay lotes entre archivos
+        if (self.model_type == "original-whisper" and config.BATCH_ACROSS_FILES and len(files) > 1
+                and not job.get('assisted_decoding')):
+            self.run_batched(files, job)
+        elif files:
+            # Mientras se transcribe un archivo, un hilo decodifica y analiza con VAD los siguientes
+            pipeline = PrefetchPipeline(files, lambda item: prepare_audio(item[0], self.model_type, job), config.PREFETCH_DEPTH)
+            for (input_path, relative_path), prepared, error in pipeline:
+                if error is not None:
+                    raise error
+                output_path = get_output_path(self.base_output_dir, relative_path, input_path)
+
+                self.transcribe_audio(input_path, output_path, job, prepared)
+            self.pipeline_report.emit(pipeline.stats())
+
+    def run_batched(self, files, job):
+        items = [(input_path, get_output_path(self.base_output_dir, relative_path, input_path))
+                 for input_path, relative_path in files]
+        # Los archivos muy largos no entran en los lotes: se transcriben después, por ventanas
+        streamed = [item for item in items if is_streaming_duration(get_audio_duration(item[0]))]
+        batched = [item for item in items if item not in streamed]
+        output_paths = dict(items)
+
+        def on_file_done(input_path):
+            self.file_finished(input_path, output_paths[input_path])
+
+        if batched:
+            report, file_times = transcribe_files_batched_with_pipeline(self.pipe, batched, job, config.PIPELINE_BATCH_SIZE,
+                                                                        on_file_done, self.progress_bus)
+            # Los tiempos se conocen al terminar el lote: repartidos por ventanas, no por orden de llegada
+            for input_path, transcription_time, audio_duration in file_times:
+                self.transcription_done.emit(input_path, transcription_time, audio_duration)
+            self.batch_report.emit(report)
+        for input_path, output_path in streamed:
+            self.transcribe_audio(input_path, output_path, job)
+
+    def transcribe_audio(self, input_path, output_path, job, prepared=None):
+        counter = None
+        if job.get('assisted_decoding') and self.model_type == "original-whisper":
+            counter = enable_assisted_decoding(self.pipe)
+            before = counter.snapshot()
+        stats = new_stats() if job.get('adaptive_beam') else None
+        transcription_time, audio_duration = transcribe_file(self.pipe, self.model_type, input_path, output_path, job, prepared,
+                                                             self.progress_bus.tracker(input_path), stats)
+        if counter is not None:
+            self.decoding_report.emit(input_path, counter.report(before))
+        if stats is not None:
+            self.escalation_report.emit(input_path, stats)
         self.transcription_done.emit(input_path, transcription_time, audio_duration)
+        self.file_finished(input_path, output_path)
+
+    def file_finished(self, input_path, output_path):
+        self.manifest.mark_done(input_path, output_path, self.signature)
+        if self.result_cache is not None:
+            for duplicate_path, duplicate_output in self.result_cache.store(input_path, output_path):
+                self.file_from_cache(duplicate_path, duplicate_output)
+
+    def file_from_cache(self, input_path, output_path):
+        self.manifest.mark_done(input_path, output_path, self.signature)
+        self.progress_bus.mark_finished(input_path)
+        self.cached_result.emit(input_path)
 
     def format_timestamp(self, seconds):
-        return format_duration(seconds)
+        return format_timestamp(seconds)
 
     def format_text(self, text):
         import re
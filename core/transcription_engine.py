@@ -0,0 +1,298 @@
+import os
+import json
+import math
+import time
+from core.pcm_cache import load_pcm, SAMPLE_RATE
+from core.speech_segments import get_speech_chunks, collect_speech, SpeechTimeMap
+from core.sharding import Segment
+from core.streaming import is_streaming_duration, transcribe_streaming
+from core.checkpoint import SegmentWriter, job_signature
+from core.adaptive_beam import transcribe_adaptive
+from utils.audio_utils import get_audio_duration, format_duration, get_output_dir
+import config
+
+# Funciones de transcripción sin dependencias de Qt, para poder usarlas
+# tanto desde los QThread como desde procesos de trabajo.
+
+def get_output_path(base_output_dir, relative_path, input_path):
+    output_dir = get_output_dir(base_output_dir, relative_path)
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, f"{os.path.splitext(os.path.basename(input_path))[0]}.txt")
+
+def build_job_options(language, translate, auto_detect, transcription_options):
+    job = dict(transcription_options)
+    job['task'] = "translate" if translate else "transcribe"
+    job['language'] = language if not auto_detect else None
+    return job
+
+def format_timestamp(seconds):
+    return format_duration(seconds)
+
+def transcribe_batched_with_faster_whisper(model, audio, job):
+    # Divide el audio en segmentos de voz con el VAD, los agrupa en ventanas de hasta 30 s
+    # y decodifica varias ventanas a la vez. No condiciona con el texto anterior.
+    from faster_whisper import BatchedInferencePipeline
+
+    print("Transcribiendo con Faster-Whisper por lotes")
+    pipeline = BatchedInferencePipeline(model=model)
+    return pipeline.transcribe(
+        audio,
+        task=job['task'],
+        language=job['language'],
+        temperature=job.get('temperature', 0.0),
+        beam_size=5,
+        batch_size=config.FASTER_WHISPER_BATCH_SIZE,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=500)
+    )
+
+def transcribe_with_faster_whisper(model, audio, writer, job, speech_chunks=None, offset=0.0, stats=None):
+    # offset: segundos ya transcritos antes de 'audio' (al retomar un archivo a medias)
+    # stats: diccionario de adaptive_beam.new_stats() para contar las ventanas escaladas
+    if job.get('batched_decoding'):
+        try:
+            segments, info = transcribe_batched_with_faster_whisper(model, audio, job)
+        except ImportError:
+            print("Esta versión de faster-whisper no tiene BatchedInferencePipeline, se usa el modo secuencial")
+        else:
+            write_segments(segments, writer, offset=offset)
+            return
+
+    if job.get('adaptive_beam'):
+        print("Transcribiendo con Faster-Whisper (voraz, con haz solo en las ventanas que lo necesitan)")
+        if isinstance(audio, str):
+            from faster_whisper import decode_audio
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+        write_segments(transcribe_adaptive(model, audio, job, speech_chunks, stats=stats), writer, offset=offset)
+        return
+
+    print("Transcribiendo con Faster-Whisper")
+    if speech_chunks is not None:
+        # El VAD ya se hizo en la etapa de prefetch: se transcribe solo la voz y se corrigen los tiempos
+        if not speech_chunks:
+            return
+        time_map = SpeechTimeMap(speech_chunks)
+        segments, info = model.transcribe(
+            collect_speech(audio, speech_chunks),
+            task=job['task'],
+            language=job['language'],
+            temperature=job.get('temperature', 0.0),
+            beam_size=5,
+            patience=1.2,
+            vad_filter=False
+        )
+        write_segments(segments, writer, time_map)
+        return
+
+    segments, info = model.transcribe(
+        audio,
+        task=job['task'],
+        language=job['language'],
+        temperature=job.get('temperature', 0.0),
+        beam_size=5,
+        patience=1.2,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=500)
+    )
+    write_segments(segments, writer, offset=offset)
+
+def write_segments(segments, writer, time_map=None, offset=0.0):
+    # Cada segmento queda confirmado en el punto de control apenas se escribe
+    for segment in segments:
+        start, end = segment.start, segment.end
+        if time_map is not None:
+            start, end = time_map.get_original_time(start), time_map.get_original_time(end, is_end=True)
+        start, end = start + offset, end + offset
+        writer.write(f"[{format_timestamp(start)} -> {format_timestamp(end)}] {segment.text}\n", end)
+
+def build_generate_kwargs(job):
+    return {
+        "task": job['task'],
+        "language": job['language'],
+        "max_new_tokens": 256,
+        "temperature": job.get('temperature', 0.0),
+        "do_sample": False,
+        "num_beams": 1
+    }
+
+def build_pipeline_kwargs(pipe, job):
+    # Argumentos de cada llamada al pipeline de transformers para un archivo o una ventana
+    generate_kwargs = build_generate_kwargs(job)
+    kwargs = {'return_timestamps': True, 'generate_kwargs': generate_kwargs}
+    if job.get('assisted_decoding'):
+        from core.assisted_decoding import enable_assisted_decoding
+        generate_kwargs['assistant_model'] = enable_assisted_decoding(pipe).assistant
+        # La generación asistida de transformers solo admite una secuencia por lote
+        kwargs['batch_size'] = 1
+    return kwargs
+
+def transcribe_with_original_whisper(pipe, audio, writer, job, offset=0.0):
+    print("Transcribiendo con Whisper Original" + (" (decodificación asistida)" if job.get('assisted_decoding') else ""))
+    result = pipe(audio, **build_pipeline_kwargs(pipe, job))
+    write_pipeline_result(result, writer, offset)
+
+def estimate_pipeline_chunks(duration, chunk_length_s=30, stride_length_s=None):
+    # Misma división en ventanas que hace el pipeline de transformers (chunk_iter)
+    if stride_length_s is None:
+        stride_length_s = chunk_length_s / 6
+    step = chunk_length_s - 2 * stride_length_s
+    if duration <= chunk_length_s:
+        return 1
+    return math.ceil((duration - chunk_length_s) / step) + 1
+
+def transcribe_files_batched_with_pipeline(pipe, items, job, batch_size, on_file_done=None, progress_bus=None):
+    # items: lista de (ruta de entrada, ruta de salida). El pipeline recibe todos los archivos
+    # juntos y arma cada lote con ventanas de varios archivos; los resultados vuelven por archivo
+    # en el mismo orden, con sus propios timestamps.
+    # on_file_done(ruta) se llama apenas se escribe cada archivo. Devuelve (informe, tiempos), con
+    # tiempos = [(ruta, segundos, duración)]: los lotes mezclan ventanas de varios archivos, así que
+    # el tiempo total se reparte al final según las ventanas de cada uno.
+    print("Transcribiendo con Whisper Original en lotes entre archivos")
+    start_time = time.time()
+    durations = [get_audio_duration(input_path) for input_path, _ in items]
+    chunks = [estimate_pipeline_chunks(duration) for duration in durations]
+
+    # Con un generador el pipeline devuelve un iterador y cada resultado llega apenas termina su archivo
+    inputs = (load_audio_input(os.path.normpath(input_path))[0] for input_path, _ in items)
+    results = pipe(inputs, batch_size=batch_size, return_timestamps=True, generate_kwargs=build_generate_kwargs(job))
+
+    for (input_path, output_path), duration, result in zip(items, durations, results):
+        tracker = progress_bus.tracker(input_path, duration) if progress_bus is not None else None
+        with SegmentWriter(output_path, progress=tracker) as writer:
+            write_pipeline_result(result, writer)
+        if tracker is not None:
+            tracker.finish()
+        if on_file_done is not None:
+            on_file_done(input_path)
+
+    wall_time = time.time() - start_time
+    total_chunks = sum(chunks)
+    file_times = [(input_path, wall_time * count / total_chunks, duration)
+                  for (input_path, _), count, duration in zip(items, chunks, durations)]
+    batched_passes = math.ceil(total_chunks / batch_size)
+    per_file_passes = sum(math.ceil(count / batch_size) for count in chunks)
+    return {
+        'files': len(items),
+        'chunks': total_chunks,
+        'batch_size': batch_size,
+        'batched_passes': batched_passes,
+        'per_file_passes': per_file_passes,
+        'batched_fill_ratio': total_chunks / (batched_passes * batch_size) if batched_passes else 0,
+        'per_file_fill_ratio': total_chunks / (per_file_passes * batch_size) if per_file_passes else 0,
+        'realtime_factor': sum(durations) / wall_time if wall_time > 0 else 0
+    }, file_times
+
+def write_pipeline_result(result, writer, offset=0.0):
+    if "chunks" in result:
+        for chunk in result["chunks"]:
+            start = chunk.get('timestamp', [0, 0])[0] + offset
+            end = chunk.get('timestamp', [0, 0])[1] + offset
+            chunk_text = chunk.get('text', '')
+            writer.write(f"[{format_timestamp(start)} -> {format_timestamp(end)}] {chunk_text}\n", end)
+    else:
+        writer.write_text(json.dumps(result, indent=2))
+
+def transcribe_segments(model, model_type, audio, job, prompt=None, stats=None):
+    # Transcribe un arreglo y devuelve los segmentos como tuplas (inicio, fin, texto) serializables.
+    # prompt: texto anterior para dar contexto a Faster-Whisper entre ventanas o partes.
+    if model_type == "faster-whisper" and job.get('batched_decoding'):
+        try:
+            segments, info = transcribe_batched_with_faster_whisper(model, audio, job)
+        except ImportError:
+            print("Esta versión de faster-whisper no tiene BatchedInferencePipeline, se usa el modo secuencial")
+        else:
+            return [Segment(segment.start, segment.end, segment.text) for segment in segments]
+    if model_type == "faster-whisper" and job.get('adaptive_beam'):
+        return list(transcribe_adaptive(model, audio, job, prompt=prompt, stats=stats))
+    if model_type == "faster-whisper":
+        segments, info = model.transcribe(
+            audio,
+            task=job['task'],
+            language=job['language'],
+            temperature=job.get('temperature', 0.0),
+            beam_size=5,
+            patience=1.2,
+            initial_prompt=prompt,
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=500)
+        )
+        return [Segment(segment.start, segment.end, segment.text) for segment in segments]
+
+    result = model(audio, **build_pipeline_kwargs(model, job))
+    duration = len(audio) / SAMPLE_RATE
+    segments = []
+    for chunk in result.get("chunks", []):
+        start, end = chunk.get('timestamp', (0, 0))
+        # El último fragmento puede quedar sin tiempo final
+        segments.append(Segment(start or 0, end if end is not None else duration, chunk.get('text', '')))
+    return segments
+
+def load_audio_input(input_path):
+    # Devuelve (audio, duración): el arreglo decodificado desde la caché PCM, o la ruta si está desactivada
+    if config.PCM_CACHE_ENABLED:
+        audio = load_pcm(input_path)
+        return audio, len(audio) / SAMPLE_RATE
+    return input_path, get_audio_duration(input_path)
+
+def prepare_audio(input_path, model_type, job):
+    # Etapa previa a la inferencia: localizar, decodificar/remuestrear y, si corresponde, pasar el VAD
+    corrected_input_path = os.path.normpath(input_path)
+
+    if not os.path.exists(corrected_input_path):
+        raise FileNotFoundError(f"No se pudo encontrar el archivo: {corrected_input_path}")
+
+    audio, audio_duration = load_audio_input(corrected_input_path)
+
+    # Los archivos muy largos se leen por ventanas al transcribirlos; aquí no se recorren enteros
+    if is_streaming_duration(audio_duration):
+        return {'audio': None, 'duration': audio_duration, 'speech_chunks': None, 'streaming': True}
+
+    speech_chunks = None
+    # El modo por lotes hace su propio VAD y con la ruta (sin caché PCM) no hay arreglo que analizar
+    if model_type == "faster-whisper" and not job.get('batched_decoding') and not isinstance(audio, str):
+        speech_chunks = get_speech_chunks(audio)
+
+    return {'audio': audio, 'duration': audio_duration, 'speech_chunks': speech_chunks, 'streaming': False}
+
+def resume_audio(audio, writer):
+    # Devuelve (audio desde el último segmento confirmado, segundos ya transcritos)
+    if writer.resume_time <= 0:
+        return audio, 0.0
+    if isinstance(audio, str):
+        print("Sin la caché PCM no se puede retomar a mitad de archivo; se empieza de nuevo")
+        writer.restart()
+        return audio, 0.0
+    print(f"Retomando desde {format_timestamp(writer.resume_time)}")
+    return audio[int(writer.resume_time * SAMPLE_RATE):], writer.resume_time
+
+def transcribe_file(model, model_type, input_path, output_path, job, prepared=None, progress=None, stats=None):
+    # Devuelve (tiempo de transcripción, duración del audio).
+    # progress: ProgressTracker opcional que recibe un evento por segmento escrito.
+    # stats: diccionario que la decodificación adaptativa completa con las ventanas escaladas.
+    start_time = time.time()
+
+    if prepared is None:
+        prepared = prepare_audio(input_path, model_type, job)
+    audio_duration = prepared['duration']
+
+    signature = job_signature(model_type, job) if config.RESUME_TRANSCRIPTIONS else None
+    with SegmentWriter(output_path, signature, progress) as writer:
+        if progress is not None:
+            progress.duration = audio_duration
+            progress.resume_from(writer.resume_time)
+        if prepared['streaming']:
+            transcribe_streaming(model, model_type, os.path.normpath(input_path), writer, job, stats)
+        else:
+            audio, offset = resume_audio(prepared['audio'], writer)
+            if model_type == "faster-whisper":
+                # Las regiones de voz del prefetch son del archivo entero: al retomar se vuelve al VAD normal
+                speech_chunks = prepared['speech_chunks'] if not offset else None
+                transcribe_with_faster_whisper(model, audio, writer, job, speech_chunks, offset, stats)
+            else:
+                transcribe_with_original_whisper(model, audio, writer, job, offset)
+
+    if progress is not None:
+        progress.finish()
+
+    transcription_time = time.time() - start_time
+    return transcription_time, audio_duration
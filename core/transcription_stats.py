@@ -0,0 +1,127 @@
+import os
+import json
+import sqlite3
+import argparse
+import config
+
+# Historial de tiempos de transcripción. Cada archivo terminado es un INSERT, sin reescribir nada,
+# y WAL deja la base íntegra si la aplicación se cierra a mitad de una escritura. De vez en cuando
+# se compacta dejando solo la última fila de cada archivo, como hacía el JSON.
+
+class TranscriptionStats:
+    # Igual que AudioCatalog: una instancia por hilo
+    def __init__(self, db_path=config.STATS_DB_PATH, legacy_json_path=config.LEGACY_STATS_JSON_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcriptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL,
+                engine TEXT,
+                compute TEXT,
+                task TEXT,
+                language TEXT,
+                quality TEXT,
+                duration REAL NOT NULL,
+                transcription_time REAL NOT NULL,
+                finished_at REAL DEFAULT (strftime('%s', 'now'))
+            );
+            CREATE INDEX IF NOT EXISTS transcriptions_engine_quality ON transcriptions (engine, quality);
+            CREATE INDEX IF NOT EXISTS transcriptions_path ON transcriptions (path);
+        """)
+        self.conn.commit()
+        if legacy_json_path is not None:
+            self.migrate_json(legacy_json_path)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def migrate_json(self, json_path):
+        # El JSON anterior se importa una sola vez y se renombra; no tiene motor ni idioma
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r') as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"No se pudo leer el historial {json_path}: {e}")
+            return 0
+        rows = [(path, record.get('quality'), record['duration'], record['transcription_time'])
+                for path, record in data.items() if record.get('duration')]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO transcriptions (path, quality, duration, transcription_time) VALUES (?, ?, ?, ?)", rows)
+        os.replace(json_path, json_path + ".migrated")
+        print(f"Historial de transcripciones migrado: {len(rows)} registros")
+        return len(rows)
+
+    def record(self, path, key, quality, duration, transcription_time):
+        # key: (motor, cómputo, tarea, idioma) del modelo de tiempos
+        with self.conn:
+            cursor = self.conn.execute("""
+                INSERT INTO transcriptions (path, engine, compute, task, language, quality, duration, transcription_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (path, *key, quality, duration, transcription_time))
+        if cursor.lastrowid % config.STATS_COMPACT_EVERY == 0:
+            self.compact()
+
+    def compact(self):
+        # Deja la última transcripción de cada archivo y devuelve cuántas filas se quitaron
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM transcriptions WHERE id NOT IN (SELECT MAX(id) FROM transcriptions GROUP BY path)")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return cursor.rowcount
+
+    def _filters(self, engine, quality):
+        clauses = []
+        params = []
+        if engine is not None:
+            clauses.append("engine = ?")
+            params.append(engine)
+        if quality is not None:
+            clauses.append("quality = ?")
+            params.append(quality)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def records(self, engine=None, quality=None):
+        where, params = self._filters(engine, quality)
+        return self.conn.execute(f"SELECT * FROM transcriptions{where} ORDER BY id", params).fetchall()
+
+    def summary(self, engine=None, quality=None):
+        where, params = self._filters(engine, quality)
+        row = self.conn.execute(f"""
+            SELECT COUNT(*) AS files, COALESCE(SUM(duration), 0) AS audio_seconds,
+                   COALESCE(SUM(transcription_time), 0) AS transcription_seconds
+            FROM transcriptions{where}
+        """, params).fetchone()
+        return dict(row)
+
+    def summary_by_engine(self):
+        rows = self.conn.execute("""
+            SELECT engine, quality, COUNT(*) AS files, SUM(duration) AS audio_seconds,
+                   SUM(transcription_time) AS transcription_seconds
+            FROM transcriptions GROUP BY engine, quality ORDER BY engine, quality
+        """).fetchall()
+        return [dict(row) for row in rows]
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial de tiempos de transcripción")
+    parser.add_argument('--compact', action='store_true', help="Dejar solo la última transcripción de cada archivo")
+    args = parser.parse_args()
+
+    stats = TranscriptionStats()
+    if args.compact:
+        print(f"Filas eliminadas: {stats.compact()}")
+    for row in stats.summary_by_engine():
+        speed = row['audio_seconds'] / row['transcription_seconds'] if row['transcription_seconds'] else 0
+        print(f"{row['engine'] or 'sin motor'} / {row['quality'] or 'sin calidad'}: "
+              f"{row['files']} archivos, {speed:.2f}x tiempo real")
+    stats.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
-import torch
-from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
-from faster_whisper import WhisperModel
+# torch, transformers y faster_whisper se importan dentro de cada función: son lentos de
+# cargar y el motor por defecto (el ejecutable Faster-Whisper-XXL) no los necesita
+import sys
+from core.model_cache import ModelCache, ctranslate2_model_size
 import config
 
+model_cache = ModelCache(int(config.MODEL_CACHE_BUDGET_GB * 1024 ** 3))
+
 def load_original_whisper_model():
+    import torch
+    from transformers import AutoModelForSpeechSeq2Seq
+
     device = "cuda:0" if torch.cuda.is_available() else "cpu"
     torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
 
@@ -11,6 +17,11 @@ def load_original_whisper_model():
         config.MODEL_ID, torch_dtype=torch_dtype, low_cpu_mem_usage=True, use_safetensors=True
     )
     model.to(device)
+    return build_original_pipeline(model)
+
+def build_original_pipeline(model):
+    # Pipeline alrededor de un modelo ya cargado (también el que llega por memoria compartida)
+    from transformers import AutoProcessor, pipeline
 
     processor = AutoProcessor.from_pretrained(config.MODEL_ID)
 
@@ -21,10 +32,10 @@ def load_original_whisper_model():
         feature_extractor=processor.feature_extractor,
         max_new_tokens=96,
         chunk_length_s=30,
-        batch_size=16,
+        batch_size=config.PIPELINE_BATCH_SIZE,
         return_timestamps=False,
-        torch_dtype=torch_dtype,
-        device=device,
+        torch_dtype=model.dtype,
+        device=model.device,
     )
 
     import warnings
@@ -33,11 +44,34 @@ def load_original_whisper_model():
 
     return pipe
 
-def load_faster_whisper_model():
+def load_assistant_model():
+    import torch
+    from transformers import AutoModelForSpeechSeq2Seq
+
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
+    print(f"Cargando el modelo borrador {config.ASSISTANT_MODEL_ID}...")
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(
+        config.ASSISTANT_MODEL_ID, torch_dtype=torch_dtype, low_cpu_mem_usage=True, use_safetensors=True
+    )
+    model.to(device)
+    return model
+
+def get_assistant_model():
+    import torch
+
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    compute_type = "float16" if torch.cuda.is_available() else "float32"
+    return model_cache.get(("assistant", config.ASSISTANT_MODEL_ID, device, compute_type), load_assistant_model)
+
+def load_faster_whisper_model(cpu_threads=0, num_workers=1):
+    import torch
+    from faster_whisper import WhisperModel
+
     device = "cuda:0" if torch.cuda.is_available() else "cpu"
     compute_type = "float16" if torch.cuda.is_available() else "int8"
 
-    model_size = "large-v2"
+    model_size = config.FASTER_WHISPER_MODEL
     
     print("Cargando Faster-Whisper...")
     model = WhisperModel(
@@ -45,10 +79,42 @@ def load_faster_whisper_model():
         device=device, 
         compute_type=compute_type, 
         download_root=config.MODEL_DIR,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
     )
 
     return model
 
+def faster_whisper_model_size(model_name, compute_type):
+    # Tamaño estimado desde los archivos ya descargados; None si no se encuentran
+    from faster_whisper.utils import download_model
+
+    try:
+        model_dir = download_model(model_name, local_files_only=True, cache_dir=config.MODEL_DIR)
+    except Exception as e:
+        print(f"No se pudo ubicar el modelo {model_name} para estimar su tamaño: {e}")
+        return None
+    return ctranslate2_model_size(model_dir, compute_type)
+
+def load_language_id_model():
+    import torch
+    from faster_whisper import WhisperModel
+
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    compute_type = "float16" if torch.cuda.is_available() else "int8"
+    print(f"Cargando el modelo de identificación de idioma ({config.LANGUAGE_ID_MODEL})...")
+    return WhisperModel(config.LANGUAGE_ID_MODEL, device=device, compute_type=compute_type, download_root=config.MODEL_DIR)
+
+def get_language_id_model():
+    import torch
+
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    compute_type = "float16" if torch.cuda.is_available() else "int8"
+    return model_cache.get(
+        ("language-id", config.LANGUAGE_ID_MODEL, device, compute_type), load_language_id_model,
+        lambda: faster_whisper_model_size(config.LANGUAGE_ID_MODEL, compute_type)
+    )
+
 def load_whisper_model(model_type="original"):
     print("Cargando Whisper Original...")
     if model_type == "original":
@@ -57,3 +123,33 @@ def load_whisper_model(model_type="original"):
         return load_faster_whisper_model()
     else:
         raise ValueError("Tipo de modelo no válido. Use 'original' o 'faster'.")
+
+def get_model_cache_key(model_type):
+    import torch
+
+    if model_type == "original":
+        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+        compute_type = "float16" if torch.cuda.is_available() else "float32"
+        return ("original", config.MODEL_ID, device, compute_type)
+    elif model_type == "faster":
+        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+        compute_type = "float16" if torch.cuda.is_available() else "int8"
+        return ("faster", config.FASTER_WHISPER_MODEL, device, compute_type)
+    else:
+        raise ValueError("Tipo de modelo no válido. Use 'original' o 'faster'.")
+
+def get_compute_label(model_type):
+    # Dispositivo y tipo de cómputo para el modelo de tiempos; None si torch todavía no se cargó,
+    # para no importarlo solo por actualizar la estimación
+    if 'torch' not in sys.modules:
+        return None
+    key = get_model_cache_key(model_type)
+    return f"{key[2]} {key[3]}"
+
+def get_whisper_model(model_type="original"):
+    # Devuelve el modelo desde la caché; solo se carga de disco si no está o fue desalojado
+    key = get_model_cache_key(model_type)
+    estimate_size = None
+    if model_type == "faster":
+        estimate_size = lambda: faster_whisper_model_size(key[1], key[3])
+    return model_cache.get(key, lambda: load_whisper_model(model_type), estimate_size)
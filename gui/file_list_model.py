@@ -0,0 +1,108 @@
+import os
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from utils.audio_utils import format_duration
+
+class AudioEntry:
+    __slots__ = ('path', 'relative_path', 'duration')
+
+    def __init__(self, path, relative_path, duration):
+        self.path = path
+        self.relative_path = relative_path
+        self.duration = duration
+
+    @property
+    def display_name(self):
+        if self.relative_path == '.':
+            return os.path.basename(self.path)
+        return f"{self.relative_path} > {os.path.basename(self.path)}"
+
+class AudioFileListModel(QAbstractListModel):
+    # Tabla de archivos con índice ruta -> fila; el texto se arma recién al pintar cada fila
+    EntryRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self.row_by_path = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"({format_duration(entry.duration)}) | {entry.display_name}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return entry.path
+        if role == self.EntryRole:
+            return entry
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.entries = []
+        self.row_by_path = {}
+        self.endResetModel()
+
+    def add_entries(self, batch):
+        new_entries = [AudioEntry(path, relative_path, duration)
+                       for path, relative_path, duration in batch if path not in self.row_by_path]
+        if not new_entries:
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_entries) - 1)
+        for row, entry in enumerate(new_entries, first):
+            self.entries.append(entry)
+            self.row_by_path[entry.path] = row
+        self.endInsertRows()
+
+    def remove_paths(self, paths):
+        rows = sorted((self.row_by_path[path] for path in paths if path in self.row_by_path), reverse=True)
+        if not rows:
+            return
+        # Quitar por tramos contiguos, de abajo hacia arriba, y reindexar desde la primera fila afectada
+        start = end = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == start - 1:
+                start = row
+                continue
+            self.beginRemoveRows(QModelIndex(), start, end)
+            for entry in self.entries[start:end + 1]:
+                del self.row_by_path[entry.path]
+            del self.entries[start:end + 1]
+            self.endRemoveRows()
+            if row is not None:
+                start = end = row
+        for row in range(rows[-1], len(self.entries)):
+            self.row_by_path[self.entries[row].path] = row
+
+    def update_entry(self, path, relative_path, duration):
+        row = self.row_by_path.get(path)
+        if row is None:
+            return
+        entry = self.entries[row]
+        entry.relative_path = relative_path
+        entry.duration = duration
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def entry_for_path(self, path):
+        row = self.row_by_path.get(path)
+        return self.entries[row] if row is not None else None
+
+    def duration_for_path(self, path):
+        entry = self.entry_for_path(path)
+        return entry.duration if entry is not None else 0
+
+    def paths_under(self, prefixes):
+        return {path for path in self.row_by_path if path.startswith(prefixes)}
+
+    def entries_for_rows(self, rows):
+        return [self.entries[row] for row in sorted(rows)]
+
+    def total_duration(self, rows):
+        return sum(self.entries[row].duration for row in rows)
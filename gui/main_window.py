@@ -3,20 +3,25 @@ import re
 import subprocess
 import sys
 import threading
-import json
-import time
 from core.sequential_transcription_thread import SequentialTranscriptionThread
 from core.faster_whisper_thread import FasterWhisperXXLThread
-from utils.audio_utils import get_audio_duration, format_duration
+from utils.audio_utils import format_duration
 from PyQt6.QtCore import Qt, QSize, QTimer, QThread, pyqtSignal, QDir, QFileSystemWatcher
 from PyQt6.QtGui import QIcon, QFont, QColor, QIcon, QStandardItemModel, QStandardItem
 from PyQt6.QtWidgets import QHBoxLayout, QLabel, QMessageBox, QSplitter, QTreeView, QMainWindow, QButtonGroup, QComboBox, QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QListWidget, QTextEdit, QFileDialog, QSlider, QProgressBar
 from gui.ui_components import setup_ui, setup_connections, set_style
-from core.file_loader import LoadFilesThread
+from core.file_loader import LoadFilesThread, FolderDiffThread
+from core.audio_catalog import AudioCatalog
 from core.transcriber import TranscriptionThread
-from core.whisper_model import load_whisper_model, load_faster_whisper_model, load_original_whisper_model
+from core.parallel_transcriber import ParallelTranscriptionThread
+from core.whisper_model import get_whisper_model, get_compute_label, model_cache
+from core.model_warmup import ModelWarmupThread
+from core.progress import ProgressBus
+from core.throughput_model import ThroughputModel
+from core.transcription_stats import TranscriptionStats
+from core.assisted_decoding import format_report
+from core.adaptive_beam import format_stats
 from utils.time_utils import format_time
-from timestamp_notepad import TimestampNotepad
 import shutil
 import config
 
@@ -25,7 +30,6 @@ class MainWindow(QMainWindow):
         super().__init__()
         
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.json_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'transcription_data.json')
         
         self.file_watcher = QFileSystemWatcher()
         self.file_watcher.directoryChanged.connect(self.on_directory_changed)
@@ -35,6 +39,16 @@ class MainWindow(QMainWindow):
         if os.path.exists(transcription_dir):
             self.file_watcher.addPath(transcription_dir)
 
+        # Watcher de la carpeta de audio: los cambios se agrupan antes de aplicarse
+        self.input_watcher = QFileSystemWatcher()
+        self.input_watcher.directoryChanged.connect(self.on_input_directory_changed)
+        self.pending_input_dirs = set()
+        self.input_diff_thread = None
+        self.input_debounce_timer = QTimer(self)
+        self.input_debounce_timer.setSingleShot(True)
+        self.input_debounce_timer.setInterval(config.INPUT_WATCH_DEBOUNCE_MS)
+        self.input_debounce_timer.timeout.connect(self.start_input_diff)
+
         self.setWindowTitle(config.APP_TITLE)
         self.setGeometry(100, 100, 800, 600)
 
@@ -47,13 +61,23 @@ class MainWindow(QMainWindow):
 
         self.selected_model = "faster-whisper-xxl"
         self.pipe = None
-        self.audio_files = []
         self.current_language = 'es'  # Establecer español como idioma predeterminado
         self.translate = True  # Establecer traducción como opción predeterminada
         self.auto_detect = False
         self.load_thread = None
-
-        self.transcription_data = self.load_transcription_data()
+        self.warmup_threads = {}
+        self.model_states = {}  # "loading" / "ready" / "error" por tipo de modelo
+        self.pending_transcription = None
+        self.warmup_scheduled = False
+
+        # La primera vez que se abre, el historial de transcripciones.json se importa a SQLite
+        self.transcription_stats = TranscriptionStats()
+        self.throughput_model = ThroughputModel()
+        if self.throughput_model.is_empty():
+            self.throughput_model.seed(self.transcription_stats.records())
+        self.running_throughput_key = None
+        self.running_quality = None
+        self.running_workers = 1
 
         setup_ui(self)
         self.setup_temperature_selection()
@@ -83,6 +107,13 @@ class MainWindow(QMainWindow):
         self.elapsed_timer = QTimer(self)
         self.elapsed_timer.timeout.connect(self.update_elapsed_time)
         self.elapsed_seconds = 0
+
+        # Los tres motores publican su avance en el mismo bus; la barra se redibuja como mucho
+        # una vez por intervalo, sin importar cuántos segmentos lleguen
+        self.progress_bus = ProgressBus()
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(config.PROGRESS_UPDATE_MS)
+        self.progress_timer.timeout.connect(self.refresh_progress)
         
         for button in self.temp_buttons.buttons():
             button.clicked.connect(self.update_estimate)
@@ -90,7 +121,8 @@ class MainWindow(QMainWindow):
         # Establecer el modelo predeterminado
         self.set_model("faster-whisper-xxl")
 
-        self.transcription_data = self.load_transcription_data()
+        # Restaurar la última carpeta desde el catálogo sin volver a sondear
+        self.restore_files_from_catalog()
 
     def on_lang_button_clicked(self, button):
         self.auto_detect = False
@@ -107,6 +139,7 @@ class MainWindow(QMainWindow):
             self.translate = False
 
         self.update_button_states()
+        self.update_estimate()
         print(f"auto_detect: {self.auto_detect}, translate: {self.translate}, language: {self.current_language}")
 
     def estimate_transcription_time(self, audio_duration):
@@ -156,9 +189,58 @@ class MainWindow(QMainWindow):
             if btn != button:
                 btn.setChecked(False)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.warmup_scheduled:
+            # Esperar a que la ventana termine de pintarse antes de empezar a cargar
+            self.warmup_scheduled = True
+            QTimer.singleShot(0, self.start_model_warmup)
+
+    def get_model_type(self):
+        if self.selected_model == "faster-whisper":
+            return "faster"
+        if self.selected_model == "original-whisper":
+            return "original"
+        return None
+
+    def start_model_warmup(self):
+        model_type = self.get_model_type()
+        if not config.MODEL_WARMUP_ENABLED or model_type is None:
+            return
+        if config.TRANSCRIPTION_WORKERS > 1:
+            return  # Cada proceso de trabajo carga su propio modelo
+        if self.model_states.get(model_type) in ("loading", "ready"):
+            return
+
+        thread = ModelWarmupThread(model_type)
+        thread.state_changed.connect(self.on_model_state_changed)
+        thread.model_ready.connect(self.on_model_ready)
+        self.warmup_threads[model_type] = thread
+        self.model_states[model_type] = "loading"
+        thread.start()
+
+    def on_model_state_changed(self, model_type, state):
+        self.model_states[model_type] = state
+        if state == "loading":
+            self.output_text.append(f"Precargando modelo {model_type} en segundo plano...")
+        elif state == "ready":
+            self.output_text.append(f"Modelo {model_type} listo.")
+        elif state == "error":
+            self.output_text.append(f"No se pudo precargar el modelo {model_type}.")
+            if self.pending_transcription is not None and model_type == self.get_model_type():
+                self.pending_transcription = None
+
+    def on_model_ready(self, model_type):
+        # Retomar la transcripción que se pidió mientras el modelo cargaba
+        if self.pending_transcription is not None and model_type == self.get_model_type():
+            selected = self.pending_transcription
+            self.pending_transcription = None
+            self.transcribe(selected)
+
     def set_model(self, model):
         self.selected_model = model
         self.pipe = None
+        self.pending_transcription = None
         
         # Actualizar el estado de los botones y su estilo
         buttons = [
@@ -178,8 +260,15 @@ class MainWindow(QMainWindow):
         # Habilitar/deshabilitar botones de calidad según el modelo seleccionado
         for button in self.temp_buttons.buttons():
             button.setEnabled(model != "faster-whisper-xxl")
+
+        self.batched_decoding_btn.setVisible(model == "faster-whisper")
+        self.assisted_decoding_btn.setVisible(model == "original-whisper")
         
         print(f"Modelo seleccionado: {model}")
+        self.update_estimate()
+
+        if self.warmup_scheduled:
+            self.start_model_warmup()
 
     def check_faster_whisper_xxl_folder(self):
         for item in os.listdir(self.base_dir):
@@ -419,50 +508,55 @@ class MainWindow(QMainWindow):
     def update_elapsed_time(self):
         self.elapsed_seconds += 1
         self.elapsed_time_label.setText(f"Tiempo transcurrido: {format_duration(self.elapsed_seconds)}")
-        self.update_progress()  # Llamamos a update_progress aquí para actualizar la barra de progreso
 
-    def update_progress(self):
-        if not hasattr(self, 'transcription_start_time'):
+    def start_progress(self, files_to_transcribe, workers=1):
+        # La clave se fija al empezar: cambiar de idioma a mitad del lote no afecta a lo que ya corre
+        self.running_throughput_key = self.get_throughput_key(workers)
+        self.running_quality = self.get_transcription_options()['quality']
+        self.running_workers = workers
+        # El total del lote son las duraciones ya conocidas por la lista de archivos
+        self.progress_bus.start_batch({path: self.file_model.duration_for_path(path) for path, _ in files_to_transcribe})
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("0.00%")
+        self.progress_bar.setVisible(True)
+        self.progress_timer.start()
+
+    def stop_progress(self):
+        self.progress_timer.stop()
+        self.refresh_progress()
+        self.running_throughput_key = None
+        self.update_estimate()
+
+    def refresh_progress(self):
+        summary = self.progress_bus.drain()
+        if summary is None:
             return
 
-        elapsed_time = time.time() - self.transcription_start_time
-        estimated_time_text = self.estimate_label.text()
-        
-        if "N/A" not in estimated_time_text:
-            estimated_time = self.parse_estimated_time(estimated_time_text)
-            if estimated_time > 0:
-                percentage = min(100, (elapsed_time / estimated_time) * 100)
-                self.progress_bar.setValue(int(percentage))
-                self.progress_bar.setFormat(f"{percentage:.2f}%")
-            else:
-                self.progress_bar.setFormat("Progreso: N/A")
-        else:
-            self.progress_bar.setFormat("Progreso: N/A")
-
-    def update_progress_bar(self, start, end, audio_file):
-        start_seconds = self.time_to_seconds(start)
-        end_seconds = self.time_to_seconds(end)
-        total_duration = self.get_audio_duration(audio_file)
-        
-        if total_duration > 0:
-            progress = min((end_seconds / total_duration) * 100, 100)  # Asegurarse de que no exceda el 100%
-            self.progress_bar.setValue(int(progress))
-            self.progress_bar.setFormat(f"{progress:.2f}%")
-
-    def time_to_seconds(self, time_str):
-        minutes, seconds = time_str.split(':')
-        return int(minutes) * 60 + float(seconds)
-
-    def get_audio_duration(self, audio_file):
-        for file, duration in self.audio_files:
-            if audio_file in file:
-                return duration
-        return 0
-    
-    def parse_estimated_time(self, time_text):
-        time_parts = time_text.split(": ")[1].split(" ")[0].split(":")
-        hours, minutes, seconds = map(int, time_parts)
-        return hours * 3600 + minutes * 60 + seconds
+        percentage = min(100.0, summary['fraction'] * 100)
+        self.progress_bar.setValue(int(percentage))
+        text = f"{percentage:.2f}% ({summary['files_done']}/{summary['total_files']})"
+        active = summary['active']
+        if len(active) == 1:
+            event = active[0]
+            text += (f" - {self.get_display_name(event.file)} {format_duration(event.position)}"
+                     f" / {format_duration(event.duration)} a {event.realtime_factor:.1f}x")
+        elif active:
+            text += f" - {len(active)} archivos en curso a {summary['realtime_factor']:.1f}x"
+        self.progress_bar.setFormat(text)
+        self.update_remaining_time(summary)
+
+    def update_remaining_time(self, summary):
+        # Lo que falta del lote, con el mismo modelo que la estimación previa
+        files_left = summary['total_files'] - summary['files_done']
+        seconds_left = max(0.0, summary['total_seconds'] - summary['processed_seconds'])
+        prediction = self.throughput_model.predict(self.running_throughput_key, files_left, seconds_left)
+        if prediction is None:
+            return
+        self.estimate_label.setText(f"Tiempo restante: {self.format_prediction(prediction, self.running_workers)}")
+
+    def get_display_name(self, audio_file):
+        entry = self.file_model.entry_for_path(audio_file)
+        return entry.display_name if entry is not None else audio_file
 
     def browse_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta de audio")
@@ -472,15 +566,20 @@ class MainWindow(QMainWindow):
             self.load_files(folder)
     
     def load_files(self, directory):
-        self.file_list.clear()
-        self.audio_files = []
+        self.file_model.clear()
         
         if self.load_thread and self.load_thread.isRunning():
             self.load_thread.requestInterruption()
             self.load_thread.wait()
+
+        self.stop_input_watching()
         
         self.load_thread = LoadFilesThread(directory)
-        self.load_thread.file_found.connect(self.add_file_to_list)
+        self.load_thread.directories_found.connect(self.watch_input_directories)
+        self.load_thread.files_found.connect(self.add_files_to_list)
+        self.load_thread.probe_summary.connect(self.on_probe_summary)
+        self.load_thread.scan_stats.connect(self.on_scan_stats)
+        self.load_thread.fingerprint_report.connect(self.on_fingerprint_report)
         self.load_thread.finished.connect(self.on_file_loading_finished)
         
         # Mostrar mensaje de carga
@@ -501,19 +600,108 @@ class MainWindow(QMainWindow):
         if self.load_thread and self.load_thread.isRunning():
             self.load_thread.requestInterruption()
             self.load_thread.wait()
+        self.stop_input_watching()
+        for thread in self.warmup_threads.values():
+            thread.wait()
+        self.transcription_stats.close()
         event.accept()
 
-    def add_file_to_list(self, file_path, relative_path):
-        duration = get_audio_duration(file_path)
-        duration_str = format_duration(duration)
-        
-        if relative_path == '.':
-            item_text = f"({duration_str}) | {os.path.basename(file_path)}"
-        else:
-            item_text = f"({duration_str}) | {relative_path} > {os.path.basename(file_path)}"
-        
-        self.file_list.addItem(item_text)
-        self.audio_files.append((file_path, duration))
+    def stop_input_watching(self):
+        self.input_debounce_timer.stop()
+        self.pending_input_dirs.clear()
+        if self.input_diff_thread and self.input_diff_thread.isRunning():
+            self.input_diff_thread.requestInterruption()
+            self.input_diff_thread.wait()
+        watched = self.input_watcher.directories()
+        if watched:
+            self.input_watcher.removePaths(watched)
+
+    def watch_input_directories(self, directories):
+        watched = {os.path.normpath(d) for d in self.input_watcher.directories()}
+        new_dirs = [d for d in directories if os.path.normpath(d) not in watched]
+        if new_dirs:
+            self.input_watcher.addPaths(new_dirs)
+
+    def on_input_directory_changed(self, path):
+        # Reiniciar el temporizador para agrupar ráfagas de cambios en una sola actualización
+        self.pending_input_dirs.add(os.path.normpath(path))
+        self.input_debounce_timer.start()
+
+    def start_input_diff(self):
+        if not self.pending_input_dirs:
+            return
+        busy_loading = self.load_thread and self.load_thread.isRunning()
+        busy_diffing = self.input_diff_thread and self.input_diff_thread.isRunning()
+        if busy_loading or busy_diffing:
+            self.input_debounce_timer.start()
+            return
+
+        changed_dirs = sorted(self.pending_input_dirs)
+        self.pending_input_dirs.clear()
+        prefixes = tuple(os.path.join(d, '') for d in changed_dirs)
+        known_paths = self.file_model.paths_under(prefixes)
+        watched_dirs = {os.path.normpath(d) for d in self.input_watcher.directories()}
+
+        self.input_diff_thread = FolderDiffThread(self.folder_input.text(), changed_dirs, known_paths, watched_dirs)
+        self.input_diff_thread.diff_ready.connect(self.apply_input_diff)
+        self.input_diff_thread.start()
+
+    def apply_input_diff(self, added, removed, modified, new_dirs):
+        # Aplicar solo las diferencias, sin vaciar ni recargar la lista
+        self.file_model.remove_paths(removed)
+        for file_path, relative_path, duration in modified:
+            self.file_model.update_entry(file_path, relative_path, duration)
+        self.file_model.add_entries(added)
+
+        self.watch_input_directories(new_dirs)
+        if added or removed or modified:
+            self.output_text.append(f"Carpeta actualizada: {len(added)} nuevos, {len(removed)} eliminados, {len(modified)} modificados")
+            self.update_transcribe_buttons()
+            self.update_estimate()
+
+    def add_files_to_list(self, batch):
+        # Los archivos llegan en lotes para reducir la cantidad de señales entre hilos
+        self.file_model.add_entries(batch)
+
+    def restore_files_from_catalog(self):
+        try:
+            catalog = AudioCatalog()
+            folder = catalog.get_setting('last_folder')
+            entries = catalog.entries_under(folder) if folder and os.path.isdir(folder) else []
+            catalog.close()
+        except Exception as e:
+            print(f"Error al leer el catálogo de audio: {e}")
+            return
+
+        if not entries:
+            return
+
+        self.folder_input.setText(folder)
+        directories = {os.path.normpath(folder)}
+        batch = []
+        for entry in entries:
+            if entry['tier'] is None:
+                # Solo tiene el hash; la revisión en segundo plano lo sondea y lo agrega
+                continue
+            relative_path = os.path.relpath(os.path.dirname(entry['path']), folder)
+            batch.append((entry['path'], relative_path, entry['duration']))
+            directories.add(os.path.dirname(entry['path']))
+        self.file_model.add_entries(batch)
+        self.update_transcribe_buttons()
+
+        # Vigilar la carpeta y revisar en segundo plano lo que cambió mientras la app estaba cerrada
+        self.watch_input_directories(sorted(directories))
+        self.pending_input_dirs.update(directories)
+        self.input_debounce_timer.start()
+
+    def on_probe_summary(self, tier_counts):
+        # Cuántos archivos respondió cada nivel de sondeo (los lentos son 'ffprobe' y 'decode')
+        summary = ", ".join(f"{tier}: {count}" for tier, count in tier_counts.items() if count)
+        if summary:
+            self.output_text.append(f"Duraciones obtenidas por nivel -> {summary}")
+
+    def on_scan_stats(self, file_count, files_per_second):
+        self.output_text.append(f"Archivos encontrados: {file_count} ({files_per_second:.0f} archivos/s)")
 
     def on_file_loading_finished(self):
         self.setEnabled(True)
@@ -537,6 +725,7 @@ class MainWindow(QMainWindow):
         self.translate = translate
         self.translate_btn.setChecked(translate)
         self.no_translate_btn.setChecked(not translate)
+        self.update_estimate()
 
     def update_button_states(self):
         is_spanish = self.current_language == 'es'
@@ -606,15 +795,23 @@ class MainWindow(QMainWindow):
             "condition_on_previous_text": True
         }
     
+    def get_selected_rows(self):
+        return [index.row() for index in self.file_list.selectionModel().selectedRows()]
+
+    def get_files_to_transcribe(self, selected):
+        # Pares (ruta del archivo, carpeta relativa) tomados directamente del modelo
+        rows = self.get_selected_rows() if selected else range(self.file_model.rowCount())
+        return [(entry.path, entry.relative_path) for entry in self.file_model.entries_for_rows(rows)]
+
     def update_transcribe_buttons(self):
-        selected_items = self.file_list.selectedItems()
-        self.transcribe_selected_btn.setVisible(len(selected_items) > 0)
+        has_selection = self.file_list.selectionModel().hasSelection()
+        self.transcribe_selected_btn.setVisible(has_selection)
         
         self.transcribe_all_btn.setStyleSheet(
             "background-color: #2d8659; color: white;"
         )
         
-        if len(selected_items) > 0:
+        if has_selection:
             self.transcribe_selected_btn.setStyleSheet(
                 "background-color: #1a5f7a; color: white;"
             )
@@ -625,7 +822,7 @@ class MainWindow(QMainWindow):
             self.trans_btn_layout.setStretch(1, 100)
 
     def transcribe(self, selected=True):
-        if not self.audio_files:
+        if self.file_model.rowCount() == 0:
             self.output_text.append("No hay archivos de audio cargados.")
             return
 
@@ -635,11 +832,18 @@ class MainWindow(QMainWindow):
                 return
             self.transcribe_with_faster_whisper_xxl(selected)
         else:
-            if not self.pipe:
+            parallel = config.TRANSCRIPTION_WORKERS > 1
+            if not self.pipe and not parallel:
+                if config.MODEL_WARMUP_ENABLED and self.model_states.get(self.get_model_type()) != "ready":
+                    # No bloquear la interfaz: esperar a la misma carga que hace la precarga
+                    self.pending_transcription = selected
+                    self.output_text.append(f"Esperando a que termine de cargar el modelo {self.selected_model}...")
+                    self.start_model_warmup()
+                    return
                 self.output_text.append(f"Cargando modelo {self.selected_model}...")
                 self.load_whisper_model()
 
-            files_to_transcribe = [item.text().split(' | ', 1)[1] for item in self.file_list.selectedItems()] if selected else [self.file_list.item(i).text().split(' | ', 1)[1] for i in range(self.file_list.count())]
+            files_to_transcribe = self.get_files_to_transcribe(selected)
             
             if not files_to_transcribe:
                 self.output_text.append("No se han seleccionado archivos para transcribir.")
@@ -647,33 +851,55 @@ class MainWindow(QMainWindow):
 
             self.output_text.append("Iniciando transcripción...")
             transcription_options = self.get_transcription_options()
+            # El botón de lotes solo se ve con Faster-Whisper; con otro motor no debe cambiar la firma
+            if self.selected_model == "faster-whisper":
+                transcription_options['batched_decoding'] = self.batched_decoding_btn.isChecked()
+            if self.selected_model == "original-whisper" and self.assisted_decoding_btn.isChecked():
+                transcription_options['assisted_decoding'] = True
+            if (self.selected_model == "faster-whisper" and config.ADAPTIVE_BEAM
+                    and not transcription_options['batched_decoding']):
+                transcription_options['adaptive_beam'] = True
             base_output_dir = os.path.join(self.base_dir, "transcription_results")
 
-            self.progress_bar.setValue(0)
-            self.progress_bar.setVisible(True)
+            self.start_progress(files_to_transcribe, config.TRANSCRIPTION_WORKERS if parallel else 1)
             
             self.elapsed_seconds = 0
             self.elapsed_timer.start(1000)
 
-            self.transcription_thread = TranscriptionThread(
-                self.pipe, files_to_transcribe, self.folder_input.text(), 
-                self.current_language, self.translate, 
-                transcription_options, self.auto_detect, 
-                base_output_dir, self.selected_model
-            )
+            if parallel:
+                self.output_text.append(f"Usando {config.TRANSCRIPTION_WORKERS} procesos de transcripción en paralelo")
+                self.transcription_thread = ParallelTranscriptionThread(
+                    files_to_transcribe,
+                    self.current_language, self.translate,
+                    transcription_options, self.auto_detect,
+                    base_output_dir, self.selected_model,
+                    config.TRANSCRIPTION_WORKERS, config.SHARE_MODEL_WEIGHTS,
+                    self.progress_bus
+                )
+                self.transcription_thread.throughput_report.connect(self.on_throughput_report)
+                self.transcription_thread.memory_report.connect(self.on_memory_report)
+            else:
+                self.transcription_thread = TranscriptionThread(
+                    self.pipe, files_to_transcribe,
+                    self.current_language, self.translate, 
+                    transcription_options, self.auto_detect, 
+                    base_output_dir, self.selected_model,
+                    self.progress_bus
+                )
+                self.transcription_thread.batch_report.connect(self.on_batch_report)
+                self.transcription_thread.pipeline_report.connect(self.on_pipeline_report)
+            self.transcription_thread.decoding_report.connect(self.on_decoding_report)
+            self.transcription_thread.escalation_report.connect(self.on_escalation_report)
             self.transcription_thread.transcription_done.connect(self.on_transcription_done)
+            self.transcription_thread.cached_result.connect(self.on_cached_result)
+            self.transcription_thread.cache_report.connect(self.on_cache_report)
+            self.transcription_thread.language_report.connect(self.on_language_report)
             self.transcription_thread.all_transcriptions_done.connect(self.on_all_transcriptions_done)
-            self.transcription_thread.progress_update.connect(self.update_progress)
-
-            self.transcription_start_time = time.time()
-            self.progress_timer = QTimer(self)
-            self.progress_timer.timeout.connect(self.update_progress)
-            self.progress_timer.start(1000)
 
             self.transcription_thread.start()
     
     def transcribe_with_faster_whisper_xxl(self, selected=True):
-        files_to_transcribe = [item.text().split(' | ', 1)[1] for item in self.file_list.selectedItems()] if selected else [self.file_list.item(i).text().split(' | ', 1)[1] for i in range(self.file_list.count())]
+        files_to_transcribe = self.get_files_to_transcribe(selected)
         
         if not files_to_transcribe:
             self.output_text.append("No se han seleccionado archivos para transcribir.")
@@ -693,18 +919,19 @@ class MainWindow(QMainWindow):
         self.elapsed_timer.start(1000)
         
         # Configurar la barra de progreso
-        self.progress_bar.setValue(0)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setFormat("0.00%")
+        self.start_progress(files_to_transcribe)
 
         self.transcription_thread = SequentialTranscriptionThread(
             files_to_transcribe, executable_path, base_output_dir, 
-            self.folder_input.text(), self.current_language, self.translate
+            self.current_language, self.translate, self.progress_bus
         )
-        self.transcription_thread.transcription_started.connect(lambda file: self.output_text.append(f"Iniciando transcripción para: {file}"))
+        self.transcription_thread.transcription_started.connect(lambda file: self.output_text.append(f"Iniciando transcripción para: {self.get_display_name(file)}"))
         self.transcription_thread.output_received.connect(self.update_output)
-        self.transcription_thread.progress_update.connect(self.update_progress_bar)
+        self.transcription_thread.transcription_done.connect(self.record_transcription_time)
         self.transcription_thread.transcription_finished.connect(self.on_transcription_finished)
+        self.transcription_thread.cached_result.connect(self.on_cached_result)
+        self.transcription_thread.cache_report.connect(self.on_cache_report)
+        self.transcription_thread.language_report.connect(self.on_language_report)
         self.transcription_thread.finished.connect(self.on_all_transcriptions_finished)
         
         self.transcription_thread.start()
@@ -717,8 +944,7 @@ class MainWindow(QMainWindow):
         self.transcribe_all_btn.setEnabled(True)
         self.transcribe_selected_btn.setEnabled(True)
         self.elapsed_timer.stop()
-        self.progress_bar.setValue(100)
-        self.progress_bar.setFormat("100%")
+        self.stop_progress()
 
     def update_output(self, line):
         if self.selected_model == "faster-whisper-xxl":
@@ -728,81 +954,150 @@ class MainWindow(QMainWindow):
 
     def on_transcription_finished(self, audio_file, success):
         if success:
-            self.output_text.append(f"Transcripción completada para: {audio_file}")
+            self.output_text.append(f"Transcripción completada para: {self.get_display_name(audio_file)}")
             self.output_text.append(f"-------------------------------------------")
             self.populate_tree_view()
         else:
-            self.output_text.append(f"Error al transcribir {audio_file}")
+            self.output_text.append(f"Error al transcribir {self.get_display_name(audio_file)}")
 
     def load_whisper_model(self):
-        if self.selected_model == "faster-whisper":
-            self.pipe = load_faster_whisper_model()
-        else:
-            self.pipe = load_original_whisper_model()
+        model_type = "faster" if self.selected_model == "faster-whisper" else "original"
+        self.pipe = get_whisper_model(model_type)
+
+        stats = model_cache.stats()
+        self.output_text.append(
+            f"Caché de modelos: {stats['hits']} aciertos, {stats['misses']} cargas "
+            f"({stats['total_load_time']:.1f}s), {stats['used_bytes'] / 1024 ** 3:.1f} GB en uso"
+        )
 
     def on_transcription_done(self, file_path, transcription_time, audio_duration):
-        transcription_options = self.get_transcription_options()
-        
-        self.transcription_data[file_path] = {
-            'duration': audio_duration,
-            'transcription_time': transcription_time,
-            'quality': transcription_options['quality']
-        }
-        self.save_transcription_data()
-        self.update_estimate()
-        
+        self.record_transcription_time(file_path, transcription_time, audio_duration)
         self.output_text.append(f"Transcripción completada: {file_path}")
         self.output_text.append(f"Tiempo de transcripción: {format_duration(transcription_time)}")
 
-    def load_transcription_data(self):
-        try:
-            with open(self.json_path, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
-        
-    def save_transcription_data(self):
-        with open(self.json_path, 'w') as f:
-            json.dump(self.transcription_data, f, indent=4)
-            
+    def record_transcription_time(self, file_path, transcription_time, audio_duration):
+        # Un INSERT por archivo: el costo no crece con el historial
+        key = self.running_throughput_key or self.get_throughput_key()
+        quality = self.running_quality or self.get_transcription_options()['quality']
+        self.transcription_stats.record(file_path, key, quality, audio_duration, transcription_time)
+        self.throughput_model.add(key, audio_duration, transcription_time)
+
+    def get_throughput_key(self, workers=1):
+        # (motor, cómputo, tarea, idioma). Con varios procesos cada archivo tarda más, así que
+        # la cantidad de procesos forma parte del cómputo
+        if self.selected_model == "faster-whisper-xxl":
+            compute = "xxl"
+        else:
+            compute = get_compute_label(self.get_model_type()) or "?"
+            if workers > 1:
+                compute += f" x{workers}"
+        task = "translate" if self.translate else "transcribe"
+        language = "auto" if self.auto_detect else self.current_language
+        return (self.selected_model, compute, task, language)
+
+    def format_prediction(self, prediction, workers=1):
+        # Los tiempos por archivo se midieron en paralelo: el reloj avanza 'workers' veces más lento
+        text = format_duration(prediction['seconds'] / workers)
+        if prediction['margin'] is not None:
+            text += f" ± {format_duration(prediction['margin'] / workers)}"
+        if prediction['level'] > 0:
+            text += " (Estimación general)"
+        return text
+
     def update_estimate(self):
-        selected_items = self.file_list.selectedItems()
-        if not selected_items:
+        if self.running_throughput_key is not None:
+            return
+        selected_rows = self.get_selected_rows()
+        if not selected_rows:
             self.estimate_label.setText("Tiempo estimado: N/A")
             return
-        
-        current_quality = self.get_transcription_options()['quality']
-        
-        matching_transcriptions = [
-            data for data in self.transcription_data.values()
-            if data['quality'] == current_quality
-        ]
-        
-        total_duration = sum(float(item.text().split('(')[1].split(')')[0].split(':')[0]) * 3600 +
-                            float(item.text().split('(')[1].split(')')[0].split(':')[1]) * 60 +
-                            float(item.text().split('(')[1].split(')')[0].split(':')[2])
-                            for item in selected_items)
-        
-        if len(matching_transcriptions) < 3:
-            # Si no hay suficientes datos, usa un promedio general
-            all_transcriptions = list(self.transcription_data.values())
-            if all_transcriptions:
-                avg_speed = sum(data['transcription_time'] / data['duration'] for data in all_transcriptions) / len(all_transcriptions)
-            else:
-                avg_speed = 1  # Fallback si no hay datos en absoluto
-            estimated_time = total_duration * avg_speed
-            self.estimate_label.setText(f"Tiempo estimado: {format_duration(estimated_time)} (Estimación general)")
-        else:
-            avg_speed = sum(data['transcription_time'] / data['duration'] for data in matching_transcriptions) / len(matching_transcriptions)
-            estimated_time = total_duration * avg_speed
-            self.estimate_label.setText(f"Tiempo estimado: {format_duration(estimated_time)}")
+
+        workers = config.TRANSCRIPTION_WORKERS if self.selected_model != "faster-whisper-xxl" else 1
+        total_duration = self.file_model.total_duration(selected_rows)
+        prediction = self.throughput_model.predict(self.get_throughput_key(workers), len(selected_rows), total_duration)
+        if prediction is None:
+            self.estimate_label.setText("Tiempo estimado: N/A")
+            return
+        self.estimate_label.setText(f"Tiempo estimado: {self.format_prediction(prediction, workers)}")
+
+    def on_batch_report(self, report):
+        self.output_text.append(
+            f"Lotes entre archivos: {report['chunks']} ventanas en {report['batched_passes']} lotes "
+            f"(llenado {report['batched_fill_ratio']:.0%}) contra {report['per_file_passes']} lotes "
+            f"archivo por archivo (llenado {report['per_file_fill_ratio']:.0%}); "
+            f"velocidad {report['realtime_factor']:.2f}x tiempo real"
+        )
+
+    def on_pipeline_report(self, report):
+        if not report:
+            return
+        stages = "decodificación" if report['bottleneck'] == "prefetch" else "transcripción"
+        self.output_text.append(
+            f"Uso por etapa: decodificación/VAD {report['prefetch_utilisation']:.0%} "
+            f"(esperando lugar {report['prefetch_blocked']:.0%}), transcripción {report['transcribe_utilisation']:.0%} "
+            f"(esperando audio {report['transcribe_waiting']:.0%}); cuello de botella: {stages}"
+        )
+
+    def on_cached_result(self, file_path):
+        self.output_text.append(f"Copiado desde la caché (audio idéntico ya transcrito): {self.get_display_name(file_path)}")
+
+    def on_cache_report(self, report):
+        total = report['hits'] + report['duplicates'] + report['near_duplicates'] + report['misses']
+        if not total:
+            return
+        self.output_text.append(
+            f"Caché de transcripciones: {report['hits']} aciertos, {report['duplicates']} copias repetidas en el lote, "
+            f"{report['near_duplicates']} casi idénticos, {report['misses']} transcritos "
+            f"({report['hit_rate']:.0%} reutilizados)"
+        )
+        for file_path, similarity in report['flagged']:
+            self.output_text.append(f"  Posible duplicado ({similarity:.0%} de similitud): {self.get_display_name(file_path)}")
+        self.show_fingerprint_costs(report['fingerprint_costs'])
+        self.populate_tree_view()
+
+    def on_decoding_report(self, file_path, report):
+        self.output_text.append(f"Decodificación asistida de {self.get_display_name(file_path)}: {format_report(report)}")
+
+    def on_escalation_report(self, file_path, stats):
+        self.output_text.append(f"Decodificación adaptativa de {self.get_display_name(file_path)}: {format_stats(stats)}")
+
+    def on_language_report(self, report):
+        languages = ", ".join(f"{language}: {count}" for language, count in report['languages'].items())
+        self.output_text.append(
+            f"Idiomas identificados en {report['elapsed']:.1f}s ({report['cached']} desde el catálogo, "
+            f"{report['detected']} detectados): {languages or 'ninguno'}"
+        )
+        if report['low_confidence']:
+            self.output_text.append(f"  {report['low_confidence']} archivos con detección automática por baja confianza")
+
+    def on_fingerprint_report(self, report):
+        self.output_text.append(
+            f"Huellas de audio: {report['computed']} calculadas de {report['files']} archivos "
+            f"en {report['elapsed']:.1f}s"
+        )
+        self.show_fingerprint_costs(report['costs'])
+
+    def show_fingerprint_costs(self, costs):
+        for file_path, cost in costs:
+            self.output_text.append(f"  Huella de {self.get_display_name(file_path)}: {cost:.2f}s")
+
+    def on_throughput_report(self, workers, throughput):
+        self.output_text.append(f"Rendimiento con {workers} procesos: {throughput:.2f} horas de audio por hora")
+
+    def on_memory_report(self, sharing_mode, reports):
+        modes = {"threads": "pesos compartidos entre hilos", "shared-memory": "pesos en memoria compartida", "none": "una copia por proceso"}
+        self.output_text.append(f"Memoria de los trabajadores ({modes.get(sharing_mode, sharing_mode)}):")
+        for report in reports:
+            self.output_text.append(
+                f"  PID {report['pid']}: RSS {report['rss'] / 1024 ** 3:.2f} GB, "
+                f"PSS {report['pss'] / 1024 ** 3:.2f} GB, USS {report['uss'] / 1024 ** 3:.2f} GB"
+            )
 
     def on_all_transcriptions_done(self):
         self.output_text.append("COMPLETADO.")
         self.progress_bar.setVisible(False)
         self.elapsed_timer.stop()
-        if hasattr(self, 'progress_timer'):
-            self.progress_timer.stop()
+        self.stop_progress()
 
     def clear_output(self):
         self.output_text.clear()
@@ -1,5 +1,6 @@
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QPushButton, QButtonGroup, QFrame, QLabel, QLineEdit, QListWidget, QTextEdit, QSlider, QProgressBar, QHBoxLayout
+from PyQt6.QtWidgets import QPushButton, QButtonGroup, QFrame, QLabel, QLineEdit, QListView, QAbstractItemView, QTextEdit, QSlider, QProgressBar, QHBoxLayout
+from gui.file_list_model import AudioFileListModel
 
 def setup_ui(window):
     folder_layout = QHBoxLayout()
@@ -11,8 +12,11 @@ def setup_ui(window):
     folder_layout.addWidget(window.browse_btn)
     window.layout.addLayout(folder_layout)
 
-    window.file_list = QListWidget()
-    window.file_list.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+    window.file_model = AudioFileListModel(window)
+    window.file_list = QListView()
+    window.file_list.setModel(window.file_model)
+    window.file_list.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
+    window.file_list.setUniformItemSizes(True)  # Evita medir cada fila en listas muy largas
     window.layout.addWidget(window.file_list)
 
     # Botones de idioma
@@ -64,6 +68,18 @@ def setup_ui(window):
     
     window.layout.addLayout(model_layout)
 
+    # Opción por trabajo: decodificación por lotes de segmentos de voz (solo Faster-Whisper)
+    window.batched_decoding_btn = QPushButton("Decodificación por lotes (más rápida, sin contexto previo)")
+    window.batched_decoding_btn.setCheckable(True)
+    window.batched_decoding_btn.setVisible(False)
+    window.layout.addWidget(window.batched_decoding_btn)
+
+    # Opción por trabajo: decodificación asistida con un modelo borrador (solo Whisper Original)
+    window.assisted_decoding_btn = QPushButton("Decodificación asistida (mismo texto, menos pasadas del modelo grande)")
+    window.assisted_decoding_btn.setCheckable(True)
+    window.assisted_decoding_btn.setVisible(False)
+    window.layout.addWidget(window.assisted_decoding_btn)
+
     # Botones de transcripción
     window.trans_btn_layout = QHBoxLayout()
     window.transcribe_selected_btn = QPushButton("Transcribir seleccionados")
@@ -109,8 +125,8 @@ def setup_connections(window):
     window.transcribe_all_btn.clicked.connect(lambda: window.transcribe(selected=False))
     
     # Conexiones para la lista de archivos
-    window.file_list.itemSelectionChanged.connect(window.update_transcribe_buttons)
-    window.file_list.itemSelectionChanged.connect(window.update_estimate)
+    window.file_list.selectionModel().selectionChanged.connect(window.update_transcribe_buttons)
+    window.file_list.selectionModel().selectionChanged.connect(window.update_estimate)
     
     # Conexión para el botón de limpiar
     window.clear_btn.clicked.connect(window.clear_output)
@@ -134,19 +150,19 @@ def set_style(window):
             background-color: #3A7CA5; 
             color: white;
         }
-        QLineEdit, QTextEdit, QListWidget { 
+        QLineEdit, QTextEdit, QListView { 
             background-color: #3D3D3D; 
             border: 1px solid #5A5A5A; 
             padding: 5px; 
         }
-        QListWidget::item:selected { 
+        QListView::item:selected { 
             background-color: #4A90E2; 
             color: white;
         }
-        QListWidget::item:hover {
+        QListView::item:hover {
             background-color: #5A5A5A;
         }
-        QListWidget::item:selected:hover {
+        QListView::item:selected:hover {
             background-color: #3A7CA5;
         }
         QPushButton:disabled { 
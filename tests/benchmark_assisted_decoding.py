@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.whisper_model import load_original_whisper_model
+from core.transcription_engine import build_pipeline_kwargs, load_audio_input
+from core.assisted_decoding import enable_assisted_decoding, format_report
+
+def transcribe(pipe, audio, job):
+    # Una ventana por lote en los dos modos, para comparar solo la decodificación
+    kwargs = dict(build_pipeline_kwargs(pipe, job), batch_size=1)
+    start_time = time.perf_counter()
+    result = pipe(audio, **kwargs)
+    return result['text'], time.perf_counter() - start_time
+
+def main():
+    file_path = input("Ingrese la ruta del archivo de audio: ").strip().strip('"')
+    if not os.path.exists(file_path):
+        print("El archivo no existe.")
+        return
+
+    language = input("Idioma (vacío para detección automática): ").strip() or None
+    job = {'task': "transcribe", 'language': language, 'temperature': 0.0}
+    pipe = load_original_whisper_model()
+    audio, duration = load_audio_input(file_path)
+
+    greedy_text, greedy_time = transcribe(pipe, audio, dict(job, assisted_decoding=False))
+    counter = enable_assisted_decoding(pipe)
+    before = counter.snapshot()
+    assisted_text, assisted_time = transcribe(pipe, audio, dict(job, assisted_decoding=True))
+    report = counter.report(before)
+
+    print(f"Audio: {duration:.1f}s")
+    print(f"Voraz:    {greedy_time:.2f}s ({duration / greedy_time:.2f}x tiempo real)")
+    print(f"Asistida: {assisted_time:.2f}s ({duration / assisted_time:.2f}x tiempo real)")
+    print(f"Aceleración medida: {greedy_time / assisted_time:.2f}x")
+    print(f"Contadores: {format_report(report)}")
+    if greedy_text == assisted_text:
+        print("El texto es idéntico en los dos modos")
+    else:
+        print("ATENCIÓN: el texto difiere entre los dos modos")
+        print(f"Voraz:    {greedy_text}")
+        print(f"Asistida: {assisted_text}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.file_scanner import scan_audio_files
+from utils.audio_utils import is_audio_file
+
+def create_synthetic_tree(root, depth, branching, files_per_dir):
+    count = 0
+    directories = [root]
+    for _ in range(depth):
+        next_level = []
+        for directory in directories:
+            for i in range(branching):
+                subdir = os.path.join(directory, f"carpeta_{i}")
+                os.makedirs(subdir, exist_ok=True)
+                next_level.append(subdir)
+        directories = next_level
+    for directory in directories:
+        for i in range(files_per_dir):
+            extension = ('.mp3', '.wav', '.m4a', '.txt')[i % 4]
+            with open(os.path.join(directory, f"audio_{i}{extension}"), 'wb') as f:
+                f.write(b'\0' * 64)
+            count += 1
+    return count
+
+def scan_with_walk(directory):
+    # Recorrido original de LoadFilesThread: os.walk serial, un archivo a la vez
+    start_time = time.perf_counter()
+    found = 0
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if is_audio_file(file):
+                os.stat(os.path.join(root, file))
+                found += 1
+    elapsed = time.perf_counter() - start_time
+    return found, elapsed
+
+def scan_with_scandir(directory, max_workers):
+    batches = []
+    stats = scan_audio_files(directory, lambda batch: batches.append(len(batch)), max_workers=max_workers)
+    return stats['files'], stats['elapsed'], len(batches)
+
+def main():
+    directory = input("Ingrese la carpeta a escanear (vacío para generar un árbol sintético): ").strip()
+    temporary = None
+    if not directory:
+        temporary = tempfile.mkdtemp(prefix="scan_bench_")
+        total = create_synthetic_tree(temporary, depth=4, branching=5, files_per_dir=20)
+        print(f"Árbol sintético creado en {temporary} con {total} archivos")
+        directory = temporary
+
+    try:
+        found, elapsed = scan_with_walk(directory)
+        print(f"os.walk: {found} archivos en {elapsed:.2f}s ({found / elapsed:.0f} archivos/s, {found} señales)")
+
+        for workers in (1, 4, 8, 16):
+            found, elapsed, batches = scan_with_scandir(directory, workers)
+            print(f"scandir x{workers}: {found} archivos en {elapsed:.2f}s ({found / elapsed:.0f} archivos/s, {batches} señales)")
+    finally:
+        if temporary:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
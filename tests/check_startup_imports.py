@@ -0,0 +1,52 @@
+import os
+import sys
+import json
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que no deben cargarse solo por abrir la ventana
+HEAVY_MODULES = ('torch', 'transformers', 'faster_whisper', 'ctranslate2', 'numpy', 'pydub', 'librosa', 'tkinter')
+
+# Tiempo máximo (segundos) para importar la interfaz
+IMPORT_BUDGET_SECONDS = 0.5
+
+MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+from gui.main_window import MainWindow
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+def measure_startup_imports():
+    result = subprocess.run([sys.executable, "-c", MEASURE_SCRIPT], cwd=PROJECT_DIR,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar la interfaz:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def find_heavy_modules(modules):
+    return sorted({name.split('.')[0] for name in modules if name.split('.')[0] in HEAVY_MODULES})
+
+def main():
+    data = measure_startup_imports()
+    heavy = find_heavy_modules(data['modules'])
+
+    print(f"Tiempo de importación de la interfaz: {data['elapsed']:.3f}s (límite {IMPORT_BUDGET_SECONDS}s)")
+    failed = False
+    if heavy:
+        print(f"ERROR: módulos pesados importados al iniciar: {', '.join(heavy)}")
+        print("Para ver quién los importa: python -X importtime -c \"from gui.main_window import MainWindow\"")
+        failed = True
+    if data['elapsed'] > IMPORT_BUDGET_SECONDS:
+        print("ERROR: la importación de la interfaz supera el límite de tiempo")
+        failed = True
+
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
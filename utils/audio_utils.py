@@ -1,20 +1,161 @@
-from pydub import AudioSegment
 import os
+import json
+import shutil
+import struct
+import subprocess
 from config import SUPPORTED_AUDIO_FORMATS
 
+# Niveles de sondeo, del más rápido al más lento
+PROBE_TIERS = ('mutagen', 'header', 'ffprobe', 'decode')
+
 def is_audio_file(filename):
     return filename.lower().endswith(SUPPORTED_AUDIO_FORMATS)
 
-def get_audio_duration(file_path):
+def _empty_info(tier):
+    return {'duration': 0, 'sample_rate': 0, 'channels': 0, 'codec': '', 'tier': tier}
+
+def probe_with_mutagen(file_path):
     try:
-        audio = AudioSegment.from_file(file_path)
-        duration_seconds = len(audio) / 1000.0
-        return duration_seconds
-    except Exception as e:
-        print(f"Error al obtener la duración de {file_path}: {str(e)}")
-        return 0
+        from mutagen import File
+    except ImportError:
+        return None
+
+    audio = File(file_path)
+    if audio is None or not getattr(audio.info, 'length', 0):
+        return None
+
+    info = _empty_info('mutagen')
+    info['duration'] = float(audio.info.length)
+    info['sample_rate'] = int(getattr(audio.info, 'sample_rate', 0) or 0)
+    info['channels'] = int(getattr(audio.info, 'channels', 0) or 0)
+    info['codec'] = getattr(audio.info, 'codec', '') or type(audio).__name__.lower()
+    return info
+
+def _probe_wav_header(f):
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        return None
+
+    info = _empty_info('header')
+    info['codec'] = 'wav'
+    byte_rate = 0
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+        if chunk_id == b'fmt ':
+            fmt = f.read(chunk_size)
+            _, channels, sample_rate, byte_rate = struct.unpack('<HHII', fmt[:12])
+            info['channels'] = channels
+            info['sample_rate'] = sample_rate
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
+        elif chunk_id == b'data':
+            if not byte_rate:
+                return None
+            info['duration'] = chunk_size / byte_rate
+            return info
+        else:
+            # Los chunks RIFF están alineados a 2 bytes
+            f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+def _probe_flac_header(f):
+    if f.read(4) != b'fLaC':
+        return None
+
+    # El primer bloque de metadatos siempre es STREAMINFO
+    block_header = f.read(4)
+    if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+        return None
+    streaminfo = f.read(34)
+    if len(streaminfo) < 34:
+        return None
+
+    packed = int.from_bytes(streaminfo[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x07) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+
+    info = _empty_info('header')
+    info['duration'] = total_samples / sample_rate
+    info['sample_rate'] = sample_rate
+    info['channels'] = channels
+    info['codec'] = 'flac'
+    return info
+
+def probe_with_header(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    with open(file_path, 'rb') as f:
+        if extension == '.wav':
+            return _probe_wav_header(f)
+        if extension == '.flac':
+            return _probe_flac_header(f)
+    return None
+
+def probe_with_ffprobe(file_path):
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None:
+        return None
+
+    command = [
+        ffprobe, '-v', 'error', '-select_streams', 'a:0',
+        '-show_entries', 'format=duration:stream=sample_rate,channels,codec_name',
+        '-of', 'json', file_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        return None
+
+    data = json.loads(result.stdout or '{}')
+    duration = float(data.get('format', {}).get('duration', 0) or 0)
+    if not duration:
+        return None
+
+    info = _empty_info('ffprobe')
+    info['duration'] = duration
+    streams = data.get('streams') or [{}]
+    info['sample_rate'] = int(streams[0].get('sample_rate', 0) or 0)
+    info['channels'] = int(streams[0].get('channels', 0) or 0)
+    info['codec'] = streams[0].get('codec_name', '')
+    return info
+
+def probe_with_decode(file_path):
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(file_path)
+    info = _empty_info('decode')
+    info['duration'] = len(audio) / 1000.0
+    info['sample_rate'] = audio.frame_rate
+    info['channels'] = audio.channels
+    info['codec'] = os.path.splitext(file_path)[1].lstrip('.').lower()
+    return info
+
+def probe_audio(file_path):
+    # Prueba cada nivel en orden y devuelve el primero que responda
+    probes = (probe_with_mutagen, probe_with_header, probe_with_ffprobe, probe_with_decode)
+    for probe in probes:
+        try:
+            info = probe(file_path)
+        except Exception as e:
+            print(f"Error al sondear {file_path} con {probe.__name__}: {str(e)}")
+            continue
+        if info is not None and info['duration'] > 0:
+            return info
+    return _empty_info('error')
+
+def get_audio_duration(file_path):
+    return probe_audio(file_path)['duration']
 
 def format_duration(seconds):
     minutes, seconds = divmod(int(seconds), 60)
     hours, minutes = divmod(minutes, 60)
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
\ No newline at end of file
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def get_output_dir(base_output_dir, relative_path):
+    # Refleja la estructura de carpetas de entrada dentro de la carpeta de resultados
+    if relative_path in ('', '.'):
+        return base_output_dir
+    return os.path.join(base_output_dir, relative_path)